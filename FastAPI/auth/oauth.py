@@ -2,11 +2,12 @@ from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from db.database import get_db
-from db.models import DbUser
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_async_db
+from db.db_user import get_user_by_username
 from db.hash import Hash
 from schemas import TokenData
+from fastapi_common.token_cache import TokenCache
 
 SECRET_KEY = "supersecretkey"  # In production, use environment variable
 ALGORITHM = "HS256"
@@ -14,6 +15,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_schema = OAuth2PasswordBearer(tokenUrl='token')
 
+# Recently verified tokens, so repeat requests skip the signature check
+token_cache = TokenCache(maxsize=4096, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -24,29 +28,29 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(DbUser).filter(DbUser.username == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
     if not user:
         return False
-    if not Hash.verify(user.password, password):
+    if not await Hash.verify_async(user.password, password):
         return False
     return user
 
-def get_current_user(token: str = Depends(oauth2_schema), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_schema), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.decode(token, SECRET_KEY, [ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(DbUser).filter(DbUser.username == token_data.username).first()
+    user = await get_user_by_username(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""Search and keyset-page latency for the blog store at a given size.
+
+Seeds a throwaway SQLite file with ``--posts`` synthetic posts (the FTS
+triggers index them as they go), then times ``/blog/search``-style queries
+and deep ``/blog/all`` pages straight through ``db.db_blog``.
+
+    python benchmarks/bench_blog_search.py --posts 1000000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TOPICS = (
+    "fastapi router dependency async session sqlite index query cursor cache token "
+    "python deploy docker worker stream upload schema model pydantic latency tuning "
+    "search ranking snippet migration backup replica thread pool event loop"
+).split()
+AUTHORS = [f"author-{i}" for i in range(500)]
+QUERIES = ["fastapi", "async session", "sqlite index query", "pyd", "event loop latency", "migration replica"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def vocabulary(rng, size: int = 50000):
+    # Made-up words drawn with Zipf-like weights, so term frequencies look like real text:
+    # a few words are everywhere, most are rare. Topic words sit in the long middle.
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "shi", "po", "ve", "da", "zu", "ri"]
+    words = list({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(size)})
+    rng.shuffle(words)
+    for position, topic in enumerate(TOPICS):
+        words.insert(200 + position * 40, topic)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def seed(posts: int, batch: int = 20000):
+    from datetime import datetime, timedelta
+    from db.database import engine
+    from db.models import DbBlog
+
+    rng = random.Random(42)
+    words, cum_weights = vocabulary(rng)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for first in range(0, posts, batch):
+            rows = [
+                {
+                    "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=6)),
+                    "content": " ".join(rng.choices(words, cum_weights=cum_weights, k=80)),
+                    "author": rng.choice(AUTHORS),
+                    "created_at": start + timedelta(minutes=i),
+                }
+                for i in range(first, min(posts, first + batch))
+            ]
+            conn.execute(DbBlog.__table__.insert(), rows)
+
+
+async def timed(fn, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": round(percentile(latencies, 50), 2), "p99_ms": round(percentile(latencies, 99), 2)}
+
+
+async def run(runs: int) -> dict:
+    from db import db_blog
+    from db.database import AsyncSessionLocal, async_engine
+
+    results = {}
+    async with AsyncSessionLocal() as db:
+        for q in QUERIES:
+            results[f"search {q!r}"] = await timed(lambda: db_blog.search_blogs(db, q, 20, 0), runs)
+        results["search page 10"] = await timed(lambda: db_blog.search_blogs(db, "fastapi", 20, 180), runs)
+
+        # Walk 50 pages deep, then time the next page from there
+        cursor = None
+        for _ in range(50):
+            _, cursor = await db_blog.get_blogs(db, cursor=cursor, limit=20)
+        results["all page 51"] = await timed(lambda: db_blog.get_blogs(db, cursor=cursor, limit=20), runs)
+        results["author page"] = await timed(lambda: db_blog.get_blogs(db, author="author-7", limit=20), runs)
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-blog-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    from db.database import Base, engine
+    import db.models  # noqa: F401  (registers the tables and FTS DDL)
+
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    seed(args.posts)
+    seed_seconds = round(time.perf_counter() - started, 1)
+
+    results = {"posts": args.posts, "seed_seconds": seed_seconds}
+    results.update(asyncio.run(run(args.runs)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Concurrent reads and writes on SQLite: default connection settings vs the profile in db/database.py.
+
+Each run uses a fresh database file and the async engine the app uses. Writer
+tasks insert and update users (what create_user/update_user do) while reader
+tasks fetch users by id, all at once, for a fixed time.
+
+    python benchmarks/bench_sqlite_profile.py --writers 8 --readers 32 --seconds 10
+
+"default" is what database.py used to do: rollback journal, synchronous=FULL and
+SQLAlchemy's default pool. "tuned" applies SQLITE_PRAGMAS and the WAL pool settings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_profile(name: str, writers: int, readers: int, seconds: float, seed_users: int) -> dict:
+    from sqlalchemy import select, text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from db.database import Base, SQLITE_PRAGMAS, apply_sqlite_pragmas, engine_options
+    from db.models import DbUser
+
+    url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench-sqlite-')}/bench.db"
+    if name == "tuned":
+        engine = create_async_engine(url, **engine_options(url))
+        apply_sqlite_pragmas(engine.sync_engine, SQLITE_PRAGMAS)
+    else:
+        engine = create_async_engine(url, connect_args={"check_same_thread": False})
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(DbUser.__table__.insert(), [
+            {"username": f"seed-{i}", "email": f"seed-{i}@example.com", "password": "x"} for i in range(seed_users)
+        ])
+        journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+
+    stats = {"write": [], "read": [], "write_errors": 0, "read_errors": 0}
+    deadline = time.perf_counter() + seconds
+
+    async def writer(n: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with Session() as db:
+                    user = DbUser(username=f"w{n}-{i}", email=f"w{n}-{i}@example.com", password="x")
+                    db.add(user)
+                    await db.commit()
+                    user.email = f"w{n}-{i}@example.org"
+                    await db.commit()
+                stats["write"].append((time.perf_counter() - started) * 1000)
+            except Exception:
+                stats["write_errors"] += 1
+            i += 1
+
+    async def reader(n: int):
+        i = n
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with Session() as db:
+                    await db.execute(select(DbUser).where(DbUser.id == i % seed_users + 1))
+                stats["read"].append((time.perf_counter() - started) * 1000)
+            except Exception:
+                stats["read_errors"] += 1
+            i += 7
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(writers)), *(reader(n) for n in range(readers)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "journal_mode": journal_mode,
+        "writes_per_s": round(len(stats["write"]) / elapsed, 1),
+        "write_p50_ms": round(percentile(stats["write"], 50), 2),
+        "write_p99_ms": round(percentile(stats["write"], 99), 2),
+        "write_errors": stats["write_errors"],
+        "reads_per_s": round(len(stats["read"]) / elapsed, 1),
+        "read_p50_ms": round(percentile(stats["read"], 50), 2),
+        "read_p99_ms": round(percentile(stats["read"], 99), 2),
+        "read_errors": stats["read_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-users", type=int, default=10000)
+    args = parser.parse_args()
+
+    async def run_all():
+        results = {"writers": args.writers, "readers": args.readers, "seconds": args.seconds}
+        for name in ("default", "tuned"):
+            results[name] = await run_profile(name, args.writers, args.readers, args.seconds, args.seed_users)
+        return results
+
+    print(json.dumps(asyncio.run(run_all()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,104 @@
-from sqlalchemy import create_engine
+import os
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from fastapi_common.metrics import record_db_call
 
 # SQLALCHEMY_DATABASE_URL = "sqlite:///./fastapi_practice.db"
-SQLALCHEMY_DATABASE_URL = "sqlite:///./fastapi_practice.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fastapi_practice.db")
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}  # Required for SQLite
-)
+def async_database_url(url: str) -> str:
+    # Same database, async driver: aiosqlite for SQLite, asyncpg for PostgreSQL
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
 
-# SessionLocal is the class for creating database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# ⚙️ SQLite connection profile, applied to every new connection. WAL lets readers run
+# alongside the single writer, NORMAL sync is durable across app crashes in WAL mode
+# (only an OS crash can lose the last commits), and the busy timeout makes a writer
+# wait for the lock instead of failing with "database is locked". Set any to "" to skip it.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    # Pages read straight from the OS page cache via mmap (bytes)
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    # Negative means KiB: 64 MiB of page cache per connection
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+# Pooled connections; each keeps its own page cache, so they are kept rather than recycled.
+# Kept small on purpose: WAL still has one writer, and a write transaction stays open across
+# awaits, so every extra connection is another writer sleeping in the busy handler.
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "4"))
+
+def apply_sqlite_pragmas(sync_engine, pragmas: dict = SQLITE_PRAGMAS):
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if value != "":
+                    cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def engine_options(url: str) -> dict:
+    if not url.startswith("sqlite"):
+        return {}
+    options = {"connect_args": {"check_same_thread": False}}  # Required for SQLite
+    if ":memory:" not in url and not url.endswith("://"):
+        # File databases get a real pool; in-memory ones keep SQLAlchemy's single-connection default
+        options.update(pool_size=SQLITE_POOL_SIZE, max_overflow=SQLITE_MAX_OVERFLOW, pool_recycle=-1)
+    return options
+
+# Sync engine: only creates the tables at startup (main.py) and seeds the benchmarks; handlers use async_engine
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+
+# Async engine for handlers that await the database instead of holding a threadpool slot
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    apply_sqlite_pragmas(engine)
+    # Async engines fire connect events on their underlying sync engine
+    apply_sqlite_pragmas(async_engine.sync_engine)
+
+def instrument(sync_engine):
+    # Time every statement for the /metrics DB counters
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        record_db_call(statement.split(None, 1)[0].upper(), elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _record_error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            statement = exception_context.statement or "UNKNOWN"
+            record_db_call(statement.split(None, 1)[0].upper(), time.perf_counter() - starts.pop(), outcome="error")
+
+instrument(engine)
+# Async engines fire the same events on their underlying sync engine
+instrument(async_engine.sync_engine)
+
+# Loaded attributes stay usable after commit, so handlers can return ORM objects
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for our models
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close();
\ No newline at end of file
@@ -0,0 +1,92 @@
+import re
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, Float, column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import DbBlog
+
+# Create Blog
+async def create_blog(db: AsyncSession, title: str, content: str, author: str):
+    new_blog = DbBlog(title=title, content=content, author=author or "Anonymous")
+    db.add(new_blog)
+    await db.commit()
+    await db.refresh(new_blog)
+    return new_blog
+
+# Read One Blog by ID
+async def get_blog(db: AsyncSession, blog_id: int):
+    return await db.get(DbBlog, blog_id)
+
+# Read Blogs newest first, one keyset page at a time
+async def get_blogs(
+    db: AsyncSession,
+    author: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = 20
+):
+    # The cursor is the last id of the previous page; ids only grow, so "id < cursor"
+    # stays an index range however deep the page is (no OFFSET scan)
+    stmt = select(DbBlog).order_by(DbBlog.id.desc()).limit(limit + 1)
+    if author:
+        stmt = stmt.where(DbBlog.author == author)
+    if date_from:
+        stmt = stmt.where(DbBlog.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(DbBlog.created_at < date_to)
+    if cursor:
+        stmt = stmt.where(DbBlog.id < cursor)
+
+    blogs = (await db.execute(stmt)).scalars().all()
+    next_cursor = None
+    if len(blogs) > limit:
+        blogs = blogs[:limit]
+        next_cursor = blogs[-1].id
+    return blogs, next_cursor
+
+def fts_query(q: str) -> str:
+    # Every word becomes a quoted term, so user input cannot use (or break) FTS5 query
+    # syntax; terms are ANDed and the last one also matches as a prefix for search-as-you-type
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+# Full-text search, best bm25 match first. Ranking and LIMIT happen inside the FTS
+# query, so only the page of hits is joined back to blogs
+SEARCH_SQL = text("""
+    WITH hits AS (
+        SELECT rowid, rank, snippet(blog_fts, 1, '[', ']', '…', 16) AS snippet
+        FROM blog_fts
+        WHERE blog_fts MATCH :match
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT blogs.id, blogs.title, blogs.author, blogs.created_at, hits.snippet, hits.rank
+    FROM hits JOIN blogs ON blogs.id = hits.rowid
+    ORDER BY hits.rank
+""").columns(
+    column("id", Integer), column("title", String), column("author", String),
+    column("created_at", DateTime), column("snippet", String), column("rank", Float)
+)
+
+async def search_blogs(db: AsyncSession, q: str, limit: int = 20, offset: int = 0):
+    match = fts_query(q)
+    if not match:
+        return []
+    rows = await db.execute(SEARCH_SQL, {"match": match, "limit": limit, "offset": offset})
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "author": row.author,
+            "created_at": row.created_at,
+            "snippet": row.snippet,
+            # bm25 is lower-is-better; flip it so a higher score means a better match
+            "score": -row.rank,
+        }
+        for row in rows
+    ]
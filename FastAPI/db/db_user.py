@@ -1,43 +1,50 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas import UserBase
 from db.models import DbUser
 from db.hash import Hash
 
 # Create User
-def create_user(db: Session, request: UserBase):
+async def create_user(db: AsyncSession, request: UserBase):
     new_user = DbUser(
         username=request.username,
         email=request.email,
-        password=Hash.bcrypt(request.password)
+        password=await Hash.bcrypt_async(request.password)
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 # Read All Users
-def get_all_users(db: Session):
-    return db.query(DbUser).all()
+async def get_all_users(db: AsyncSession):
+    result = await db.execute(select(DbUser))
+    return result.scalars().all()
 
 # Read One User by ID
-def get_user(db: Session, user_id: int):
-    return db.query(DbUser).filter(DbUser.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(DbUser, user_id)
+
+# Read One User by username
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(DbUser).where(DbUser.username == username).limit(1))
+    return result.scalars().first()
 
 # Update User by ID
-def update_user(db: Session, user_id: int, request: UserBase):
-    user = db.query(DbUser).filter(DbUser.id == user_id).first()
+async def update_user(db: AsyncSession, user_id: int, request: UserBase):
+    user = await db.get(DbUser, user_id)
     if user:
         user.username = request.username
         user.email = request.email
-        user.password = Hash.bcrypt(request.password)
-        db.commit()
-        db.refresh(user)
+        user.password = await Hash.bcrypt_async(request.password)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 # Delete User by ID
-def delete_user(db: Session, user_id: int):
-    user = db.query(DbUser).filter(DbUser.id == user_id).first()
+async def delete_user(db: AsyncSession, user_id: int):
+    user = await db.get(DbUser, user_id)
     if user:
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
     return user
@@ -1,12 +1,23 @@
 from passlib.context import CryptContext
+from fastapi_common.password_hasher import PasswordHasher
 
 pwd_cxt = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
+password_hasher = PasswordHasher(pwd_cxt)
+
 class Hash():
     @staticmethod
     def bcrypt(password: str):
         return pwd_cxt.hash(password)
-    
+
     @staticmethod
     def verify(hashed_password, plain_password):
-        return pwd_cxt.verify(plain_password, hashed_password)
\ No newline at end of file
+        return pwd_cxt.verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def bcrypt_async(password: str):
+        return await password_hasher.hash(password)
+
+    @staticmethod
+    async def verify_async(hashed_password, plain_password):
+        return await password_hasher.verify(plain_password, hashed_password)
@@ -1,6 +1,7 @@
-from sqlalchemy.sql.sqltypes import Integer, String
+from sqlalchemy.sql.sqltypes import Integer, String, Text, DateTime
 from db.database import Base
-from sqlalchemy import Column
+from sqlalchemy import Column, DDL, Index, event
+from datetime import datetime
 
 class DbUser(Base):
     __tablename__ = 'users'
@@ -8,4 +9,42 @@ class DbUser(Base):
     username = Column(String)
     email = Column(String)
     password = Column(String)
-    
\ No newline at end of file
+
+class DbBlog(Base):
+    __tablename__ = 'blogs'
+    id = Column(Integer, primary_key = True)
+    title = Column(String, nullable = False)
+    content = Column(Text, nullable = False)
+    author = Column(String, nullable = False, default = "Anonymous")
+    created_at = Column(DateTime, nullable = False, default = datetime.utcnow)
+
+    # Author filter and date range, both walked newest-first by id for keyset pages
+    __table_args__ = (
+        Index('ix_blogs_author_id', 'author', 'id'),
+        Index('ix_blogs_created_at_id', 'created_at', 'id'),
+    )
+
+# 🔍 Full-text index over blogs (SQLite FTS5). It stores no copy of the text
+# (external content), and triggers keep it in step with every insert/update/delete.
+# The 2/3-letter prefix indexes keep search-as-you-type prefixes from scanning the vocabulary.
+BLOG_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_fts USING fts5(
+        title, content, author, content='blogs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # Title matches outrank body matches in bm25
+    "INSERT INTO blog_fts(blog_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 5.0)')",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_insert AFTER INSERT ON blogs BEGIN
+        INSERT INTO blog_fts(rowid, title, content, author) VALUES (new.id, new.title, new.content, new.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_delete AFTER DELETE ON blogs BEGIN
+        INSERT INTO blog_fts(blog_fts, rowid, title, content, author) VALUES ('delete', old.id, old.title, old.content, old.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_update AFTER UPDATE ON blogs BEGIN
+        INSERT INTO blog_fts(blog_fts, rowid, title, content, author) VALUES ('delete', old.id, old.title, old.content, old.author);
+        INSERT INTO blog_fts(rowid, title, content, author) VALUES (new.id, new.title, new.content, new.author);
+    END""",
+]
+
+for statement in BLOG_FTS_DDL:
+    event.listen(DbBlog.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
@@ -1,20 +1,55 @@
 from fastapi import FastAPI
 from routers import blog_post, blog_get, user, file as file_router
-from db.database import engine
+from db.database import engine, async_engine
 from db import models
 from fastapi import Request
-from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, FileResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, FileResponse, Response
 from fastapi import UploadFile, File, HTTPException, Depends
 import os
 from fastapi.staticfiles import StaticFiles
-from auth.oauth import get_current_user
+from auth.oauth import get_current_user, token_cache
+from fastapi_common.metrics import REGISTRY, CONTENT_TYPE_LATEST, MetricsMiddleware
+from contextlib import asynccontextmanager
+from utils.resumable_upload import run_janitor
+from db.hash import password_hasher
+import asyncio
+
+# 🔌 Start the partial-upload janitor; close pooled async DB connections on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    janitor = asyncio.create_task(run_janitor())
+    try:
+        yield
+    finally:
+        janitor.cancel()
+        try:
+            await janitor
+        except asyncio.CancelledError:
+            pass
+        password_hasher.shutdown()
+        await async_engine.dispose()
 
 app = FastAPI(
     title="FastAPI Blog API",
     description="A sample blog backend using FastAPI Routers",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# 📈 Per-route latency, response size and DB call metrics
+app.add_middleware(MetricsMiddleware)
+
+# 🔐 Password hashing pool: queue depth (latency and rejections are recorded in fastapi_common.password_hasher)
+REGISTRY.gauge_callback("password_hash_in_flight", "Password hash jobs admitted to the pool", lambda: password_hasher.in_flight)
+REGISTRY.gauge_callback("password_hash_waiting", "Password hash jobs waiting for a slot", lambda: password_hasher.waiting)
+# 🔑 Verified-token cache
+REGISTRY.counter_callback("token_cache_hits_total", "Verified-token cache hits", lambda: token_cache.hits)
+REGISTRY.counter_callback("token_cache_misses_total", "Verified-token cache misses", lambda: token_cache.misses)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
 # 👾 Define a custom exception
 class StoryException(Exception):
     def __init__(self, name: str):
@@ -1,34 +1,56 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_async_db
+from db import db_blog
+from schemas import BlogDisplay, BlogPage, BlogSearchResults
 
 router = APIRouter()
 
 @router.get(
     "/all",
+    response_model=BlogPage,
     summary="Get all blog posts",
-    description="Returns a list of all blog posts. You can filter by author using the optional query parameter."
+    description="Returns blog posts newest first, one page at a time. Filter by author and/or a created_at range; "
+                "pass the returned next_cursor to fetch the following page."
 )
-def get_all_blogs(author: Optional[str] = Query(None, description="Filter blogs by author")):
-    # This is just mock data for demonstration
-    blogs = [
-        {"id": 1, "title": "Intro to FastAPI", "author": "Alice"},
-        {"id": 2, "title": "Building APIs with FastAPI", "author": "Bob"},
-    ]
+async def get_all_blogs(
+    author: Optional[str] = Query(None, description="Filter blogs by author"),
+    date_from: Optional[datetime] = Query(None, description="Only posts created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only posts created before this time"),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Posts per page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    blogs, next_cursor = await db_blog.get_blogs(db, author, date_from, date_to, cursor, limit)
+    return {"blogs": blogs, "next_cursor": next_cursor}
 
-    if author:
-        blogs = [blog for blog in blogs if blog["author"] == author]
-
-    return {"blogs": blogs}
+# 🔍 Declared before /{blog_id} so "search" is not parsed as an id
+@router.get(
+    "/search",
+    response_model=BlogSearchResults,
+    summary="Search blog posts",
+    description="Full-text search over title, content and author, best match first. "
+                "The last word also matches as a prefix."
+)
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    results = await db_blog.search_blogs(db, q, limit, offset)
+    return {"query": q, "results": results}
 
 @router.get(
     "/{blog_id}",
+    response_model=BlogDisplay,
     summary="Get a blog post by ID",
     description="Fetch a single blog post using its unique ID."
 )
-def get_blog(blog_id: int):
-    # Mock blog
-    return {
-        "id": blog_id,
-        "title": f"Sample Blog {blog_id}",
-        "content": "This is a sample blog post."
-    }
+async def get_blog(blog_id: int, db: AsyncSession = Depends(get_async_db)):
+    blog = await db_blog.get_blog(db, blog_id)
+    if not blog:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    return blog
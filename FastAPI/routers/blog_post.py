@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Body, Path, Query
+from fastapi import APIRouter, Body, Depends, Path, Query
 from pydantic import BaseModel
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_async_db
+from db import db_blog
+from schemas import BlogCreated
 
 router = APIRouter()
 
@@ -12,13 +16,15 @@ class BlogPost(BaseModel):
 
 @router.post(
     "/create",
+    response_model=BlogCreated,
     summary="Create a new blog post",
     description="This endpoint allows you to create a new blog post with a title, content, and optional author."
 )
-def create_blog(post: BlogPost = Body(...)):
+async def create_blog(post: BlogPost = Body(...), db: AsyncSession = Depends(get_async_db)):
+    blog = await db_blog.create_blog(db, post.title, post.content, post.author)
     return {
         "message": "Blog created successfully!",
-        "data": post
+        "data": blog
     }
 
 @router.post("/new/{id}")
@@ -1,41 +1,105 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from auth.oauth import get_current_user
+from utils.line_stream import ndjson_upload, summarize_lines, take_upload
+from utils.file_serving import serve_file
+from utils.resumable_upload import (
+    TUS_VERSION, MAX_UPLOAD_SIZE, UPLOAD_DIR, parse_metadata, create_upload, load_upload, append_chunk, finish_upload, save_stream
+)
 
 router = APIRouter(
     prefix='/file',
     tags=['files']
 )
 
+LineMode = Literal["lines", "count", "summary"]
+MODE_DESCRIPTION = "lines: stream every line as NDJSON; count: only the line count; summary: counts and lengths"
+
+async def lines_response(upload: UploadFile, mode: str, extra: dict):
+    # The upload is read in fixed-size chunks, so memory stays flat for any file size
+    if mode == "lines":
+        # The body streams after this handler returns, so the response must own the file
+        return StreamingResponse(ndjson_upload(take_upload(upload)), media_type="application/x-ndjson")
+    summary = await summarize_lines(upload, count_only=(mode == "count"))
+    return {**extra, **summary}
+
 # 1. Upload file as bytes
 @router.post("/upload-bytes/")
-def upload_bytes(file: bytes = File(...)):
-    content = file.decode('utf-8')
-    lines = content.split('\n')
-    return {"lines": lines}
+async def upload_bytes(file: UploadFile = File(...), mode: LineMode = Query("lines", description=MODE_DESCRIPTION)):
+    return await lines_response(file, mode, {})
 
 # 2. Upload file as UploadFile
 @router.post("/upload-file/")
-async def upload_file(upload_file: UploadFile = File(...)):
-    content = await upload_file.read()
-    lines = content.decode('utf-8').split('\n')
-    return {"filename": upload_file.filename, "lines": lines}
+async def upload_file(upload_file: UploadFile = File(...), mode: LineMode = Query("lines", description=MODE_DESCRIPTION)):
+    return await lines_response(upload_file, mode, {"filename": upload_file.filename})
 
-# 3. Save uploaded file to disk
+async def upload_chunks(upload: UploadFile, chunk_size: int = 1024 * 1024):
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+# 3. Save uploaded file to disk (streamed in chunks, written off the event loop)
 @router.post("/save-file/")
 async def save_file(upload_file: UploadFile = File(...)):
-    os.makedirs("uploaded", exist_ok=True)
-    file_path = f"uploaded/{upload_file.filename}"
-    with open(file_path, "wb") as f:
-        content = await upload_file.read()
-        f.write(content)
+    await save_stream(upload_file.filename, upload_chunks(upload_file))
     return {"msg": f"Saved {upload_file.filename} successfully"}
 
+# 🔁 Resumable uploads (tus 1.0 core + creation + termination)
+# POST creates an upload, PATCH appends bytes at Upload-Offset, HEAD reports progress.
+# The finished file is checked against the optional sha256 metadata and moved into uploaded/.
+TUS_HEADERS = {"Tus-Resumable": TUS_VERSION}
+
+@router.options("/uploads")
+def upload_options():
+    return Response(status_code=204, headers={
+        **TUS_HEADERS, "Tus-Version": TUS_VERSION,
+        "Tus-Extension": "creation,termination", "Tus-Max-Size": str(MAX_UPLOAD_SIZE)
+    })
+
+@router.post("/uploads", status_code=201)
+async def create_resumable_upload(
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    state = await create_upload(upload_length, parse_metadata(upload_metadata), current_user.username)
+    headers = {**TUS_HEADERS, "Location": f"{router.prefix}/uploads/{state.upload_id}"}
+    if state.length == 0:
+        # Nothing to PATCH: an empty file is complete as soon as it exists
+        await finish_upload(state)
+    return Response(status_code=201, headers=headers)
+
+@router.head("/uploads/{upload_id}")
+async def upload_progress(upload_id: str, current_user = Depends(get_current_user)):
+    state = await load_upload(upload_id, current_user.username)
+    return Response(headers={
+        **TUS_HEADERS, "Upload-Offset": str(await state.offset()),
+        "Upload-Length": str(state.length), "Cache-Control": "no-store"
+    })
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_type: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    if content_type != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    state = await load_upload(upload_id, current_user.username)
+    # request.stream() hands over the body as it arrives; nothing is buffered whole
+    offset, _ = await append_chunk(state, upload_offset, request.stream())
+    return Response(status_code=204, headers={**TUS_HEADERS, "Upload-Offset": str(offset)})
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str, current_user = Depends(get_current_user)):
+    state = await load_upload(upload_id, current_user.username)
+    await state.remove()
+    return Response(status_code=204, headers=TUS_HEADERS)
+
 # 4. Download file endpoint (protected)
-@router.get("/download/{file_name}")
-def download_file_protected(file_name: str, current_user: dict = Depends(get_current_user)):
-    file_path = f"uploaded/{file_name}"
-    if os.path.exists(file_path):
-        return FileResponse(path=file_path, filename=file_name, media_type='application/octet-stream')
-    raise HTTPException(status_code=404, detail="File not found")
+# Supports Range/multipart ranges (resumable downloads), ETag/Last-Modified 304s and HEAD
+@router.api_route("/download/{file_name}", methods=["GET", "HEAD"])
+def download_file_protected(file_name: str, request: Request, current_user: dict = Depends(get_current_user)):
+    return serve_file(request, UPLOAD_DIR, file_name)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas import UserBase, UserDisplay
-from db.database import get_db
+from db.database import get_async_db
 from db import db_user
 from typing import List
 from fastapi.security import OAuth2PasswordRequestForm
@@ -17,43 +17,48 @@ router = APIRouter(
 
 # ✅ Create User
 @router.post("/", response_model=UserDisplay)
-def create_user(request: UserBase, db: Session = Depends(get_db)):
-    return db_user.create_user(db, request)
+async def create_user(request: UserBase, db: AsyncSession = Depends(get_async_db)):
+    return await db_user.create_user(db, request)
 
 # ✅ Read All Users
 @router.get("/", response_model=List[UserDisplay])
-def get_all_users(db: Session = Depends(get_db)):
-    users = db_user.get_all_users(db)
+async def get_all_users(db: AsyncSession = Depends(get_async_db)):
+    users = await db_user.get_all_users(db)
     return users
 
+# Protected route (declared before /{user_id} so "me" is not parsed as an id)
+@router.get("/me", response_model=UserDisplay)
+async def read_users_me(current_user: UserBase = Depends(get_current_user)):
+    return current_user
+
 # ✅ Read One User
 @router.get("/{user_id}", response_model=UserDisplay)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db_user.get_user(db, user_id)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db_user.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 # ✅ Update User
 @router.put("/{user_id}", response_model=UserDisplay)
-def update_user(user_id: int, request: UserBase, db: Session = Depends(get_db)):
-    user = db_user.update_user(db, user_id, request)
+async def update_user(user_id: int, request: UserBase, db: AsyncSession = Depends(get_async_db)):
+    user = await db_user.update_user(db, user_id, request)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 # ✅ Delete User
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db_user.delete_user(db, user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db_user.delete_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"detail": "User deleted successfully"}
 
 # OAuth2 login endpoint
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,9 +66,4 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(data={"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
-
-# Protected route
-@router.get("/me", response_model=UserDisplay)
-def read_users_me(current_user: UserBase = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
 
 class UserBase(BaseModel):
     username: str
@@ -16,4 +18,33 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: str | None = None
\ No newline at end of file
+    username: str | None = None
+
+class BlogDisplay(BaseModel):
+    id: int
+    title: str
+    content: str
+    author: str
+    created_at: datetime
+    class Config():
+        orm_mode = True
+
+class BlogCreated(BaseModel):
+    message: str
+    data: BlogDisplay
+
+class BlogPage(BaseModel):
+    blogs: List[BlogDisplay]
+    next_cursor: Optional[int] = None
+
+class BlogSearchHit(BaseModel):
+    id: int
+    title: str
+    author: str
+    created_at: datetime
+    snippet: str
+    score: float
+
+class BlogSearchResults(BaseModel):
+    query: str
+    results: List[BlogSearchHit]
@@ -0,0 +1,286 @@
+import os
+import secrets
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+# More ranges than this in one request are ignored and the whole file is sent
+MAX_RANGES = int(os.getenv("MAX_RANGES", "16"))
+FILE_STAT_CACHE_TTL = float(os.getenv("FILE_STAT_CACHE_TTL", "2"))
+FILE_STAT_CACHE_SIZE = int(os.getenv("FILE_STAT_CACHE_SIZE", "1024"))
+
+
+def safe_join(base_dir: str, name: str) -> str:
+    # Resolve symlinks and "..", then refuse anything that lands outside base_dir
+    base = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base or path == base:
+        raise HTTPException(status_code=404, detail="File not found")
+    return path
+
+
+class FileMeta:
+    __slots__ = ("size", "mtime", "etag", "last_modified")
+
+    def __init__(self, st: os.stat_result):
+        self.size = st.st_size
+        self.mtime = int(st.st_mtime)
+        self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+
+
+class StatCache:
+    """Short-lived cache of path -> FileMeta, so revalidations (304s) skip path
+    resolution and stat. Transfers always re-stat the open file and refresh it."""
+
+    def __init__(self, ttl: float = FILE_STAT_CACHE_TTL, max_entries: int = FILE_STAT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, FileMeta]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[FileMeta]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], meta: FileMeta):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, meta)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+stat_cache = StatCache()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _not_modified_since(header: str, meta: FileMeta) -> bool:
+    try:
+        return meta.mtime <= int(parsedate_to_datetime(header).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+def is_not_modified(request: Request, meta: FileMeta) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, meta.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    return if_modified_since is not None and _not_modified_since(if_modified_since, meta)
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a Range header into sorted, merged (start, end) pairs, end inclusive.
+
+    Returns None when the header should be ignored (the whole file is sent) and an
+    empty list when nothing in it is satisfiable (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges = []
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+    for part in parts:
+        first, dash, last = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else max(start, size - 1)
+                if start > end:
+                    return None
+            else:
+                suffix = int(last)
+                start, end = max(size - suffix, 0), size - 1
+                if suffix == 0:
+                    continue
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    # Overlapping or touching ranges collapse, so a request cannot make us send a byte twice
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_allows(request: Request, meta: FileMeta) -> bool:
+    # A stale If-Range means "send me the whole new file", not the requested part
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == meta.etag
+    return _not_modified_since(if_range, meta)
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class RangeFileResponse(Response):
+    """Sends parts of an open file: the whole of it, one range, or multipart/byteranges.
+
+    Serving is chunked pread: the file is read with os.pread in DOWNLOAD_CHUNK_SIZE
+    pieces in a worker thread, so the event loop never waits on disk. An ASGI app
+    cannot reach the socket to os.sendfile() itself, so there is no zero-copy path
+    under uvicorn. The http.response.zerocopy/pathsend extensions are used only if a
+    server offers them; uvicorn does not.
+    """
+
+    def __init__(self, file, path: str, segments: list, status_code: int, headers: dict, whole_file: bool):
+        # segments: bytes to write as-is, or (offset, count) to send from the file
+        super().__init__(status_code=status_code, headers=headers)
+        self.file = file
+        self.path = path
+        self.segments = segments
+        self.whole_file = whole_file
+        self.headers["content-length"] = str(sum(
+            len(segment) if isinstance(segment, bytes) else segment[1] for segment in segments
+        ))
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            extensions = scope.get("extensions") or {}
+            if self.whole_file and "http.response.pathsend" in extensions:
+                await send({"type": "http.response.pathsend", "path": self.path})
+                return
+
+            zerocopy = "http.response.zerocopy" in extensions
+            for segment in self.segments:
+                if isinstance(segment, bytes):
+                    await send({"type": "http.response.body", "body": segment, "more_body": True})
+                elif zerocopy:
+                    offset, count = segment
+                    await send({
+                        "type": "http.response.zerocopy", "file": self.file,
+                        "offset": offset, "count": count, "more_body": True
+                    })
+                else:
+                    await self._send_chunks(send, *segment)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self.file.close()
+
+    async def _send_chunks(self, send, offset: int, count: int):
+        fd = self.file.fileno()
+        end = offset + count
+        while offset < end:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, end - offset), offset)
+            if not chunk:
+                # The file shrank underneath us; stop rather than spin
+                raise RuntimeError(f"{self.path} truncated during download")
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            offset += len(chunk)
+
+
+def serve_file(
+    request: Request,
+    base_dir: str,
+    name: str,
+    media_type: str = "application/octet-stream"
+) -> Response:
+    """Download response for base_dir/name with ETag/Last-Modified revalidation and
+    single or multipart byte ranges. Call it from a sync route: it opens and stats
+    the file."""
+    key = (base_dir, name)
+    meta = stat_cache.get(key)
+    if meta is not None and is_not_modified(request, meta):
+        return Response(status_code=304, headers={"etag": meta.etag, "last-modified": meta.last_modified})
+
+    path = safe_join(base_dir, name)
+    try:
+        file = open(path, "rb", buffering=0)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        st = os.fstat(file.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=404, detail="File not found")
+        meta = FileMeta(st)
+        stat_cache.put(key, meta)
+
+        headers = {"etag": meta.etag, "last-modified": meta.last_modified, "accept-ranges": "bytes"}
+        if is_not_modified(request, meta):
+            file.close()
+            return Response(status_code=304, headers={"etag": meta.etag, "last-modified": meta.last_modified})
+
+        range_header = request.headers.get("range")
+        ranges = parse_range(range_header, meta.size) if range_header and _if_range_allows(request, meta) else None
+        if ranges == []:
+            file.close()
+            return Response(status_code=416, headers={"content-range": f"bytes */{meta.size}", **headers})
+
+        if not ranges:
+            headers.update({"content-type": media_type, "content-disposition": content_disposition(name)})
+            segments = [(0, meta.size)] if meta.size else []
+            return RangeFileResponse(file, path, segments, 200, headers, whole_file=True)
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers.update({
+                "content-type": media_type,
+                "content-range": f"bytes {start}-{end}/{meta.size}",
+                "content-disposition": content_disposition(name),
+            })
+            return RangeFileResponse(file, path, [(start, end - start + 1)], 206, headers, whole_file=False)
+
+        boundary = secrets.token_hex(16)
+        segments = []
+        for start, end in ranges:
+            part_headers = (
+                f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{meta.size}\r\n\r\n"
+            )
+            segments.append((b"\r\n" if segments else b"") + part_headers.encode("latin-1"))
+            segments.append((start, end - start + 1))
+        segments.append(f"\r\n--{boundary}--\r\n".encode("latin-1"))
+        headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        return RangeFileResponse(file, path, segments, 206, headers, whole_file=False)
+    except BaseException:
+        if not file.closed:
+            file.close()
+        raise
@@ -0,0 +1,249 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import secrets
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploaded")
+# Partial uploads and their sidecars; a sibling of UPLOAD_DIR so the final rename stays on one filesystem
+PARTIAL_UPLOAD_DIR = os.getenv("PARTIAL_UPLOAD_DIR", "uploaded_partial")
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 ** 3)))
+UPLOAD_EXPIRE_HOURS = float(os.getenv("UPLOAD_EXPIRE_HOURS", "24"))
+UPLOAD_JANITOR_INTERVAL = float(os.getenv("UPLOAD_JANITOR_INTERVAL", "600"))
+HASH_CHUNK_SIZE = 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+TUS_VERSION = "1.0.0"
+# tus's status for a failed checksum
+CHECKSUM_MISMATCH = 460
+
+
+def safe_filename(name: Optional[str]) -> str:
+    # Only the last path component is kept; "uploaded/../x" style names cannot escape
+    name = os.path.basename((name or "").replace("\\", "/"))
+    if name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    return name
+
+
+def parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    # Upload-Metadata: "filename d29ybGQudHh0,sha256 <base64 of the hex digest>"
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8") if value else ""
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for {key}")
+    return metadata
+
+
+class UploadState:
+    """One resumable upload: <id>.part holds the bytes, <id>.json the rest.
+
+    The offset is never stored: it is the size of the .part file, so a connection
+    dropped mid-PATCH resumes from exactly what reached the disk.
+    """
+
+    def __init__(self, upload_id: str, length: int, filename: str, owner: str, sha256: Optional[str] = None):
+        self.upload_id = upload_id
+        self.length = length
+        self.filename = filename
+        self.owner = owner
+        self.sha256 = sha256
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(PARTIAL_UPLOAD_DIR, f"{self.upload_id}.part")
+
+    @property
+    def info_path(self) -> str:
+        return os.path.join(PARTIAL_UPLOAD_DIR, f"{self.upload_id}.json")
+
+    async def offset(self) -> int:
+        try:
+            return (await aiofiles.os.stat(self.part_path)).st_size
+        except FileNotFoundError:
+            # Finished (or expired) between loading the sidecar and now
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+    async def save(self):
+        # Write-then-rename so a crash never leaves a half-written sidecar
+        tmp_path = self.info_path + ".tmp"
+        async with aiofiles.open(tmp_path, "w") as f:
+            await f.write(json.dumps({
+                "length": self.length, "filename": self.filename,
+                "owner": self.owner, "sha256": self.sha256
+            }))
+        await aiofiles.os.replace(tmp_path, self.info_path)
+
+    async def remove(self):
+        for path in (self.part_path, self.info_path):
+            try:
+                await aiofiles.os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+async def create_upload(length: int, metadata: Dict[str, str], owner: str) -> UploadState:
+    if length < 0 or length > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"Upload-Length must be between 0 and {MAX_UPLOAD_SIZE}")
+    sha256 = metadata.get("sha256")
+    if sha256 is not None and len(sha256) != 64:
+        raise HTTPException(status_code=400, detail="sha256 metadata must be a hex digest")
+
+    await aiofiles.os.makedirs(PARTIAL_UPLOAD_DIR, exist_ok=True)
+    state = UploadState(secrets.token_hex(16), length, safe_filename(metadata.get("filename")), owner, sha256)
+    async with aiofiles.open(state.part_path, "wb"):
+        pass
+    await state.save()
+    return state
+
+
+async def load_upload(upload_id: str, owner: str) -> UploadState:
+    # Ids are our own hex tokens; anything else cannot name a sidecar
+    if not upload_id.isalnum():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        async with aiofiles.open(os.path.join(PARTIAL_UPLOAD_DIR, f"{upload_id}.json")) as f:
+            info = json.loads(await f.read())
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if info["owner"] != owner:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return UploadState(upload_id, info["length"], info["filename"], info["owner"], info.get("sha256"))
+
+
+# One PATCH at a time per upload (per process); a second writer would interleave bytes
+_active_patches = set()
+
+
+async def append_chunk(state: UploadState, offset: int, chunks: AsyncIterator[bytes]) -> Tuple[int, Optional[str]]:
+    """Append a PATCH body at ``offset``; returns the new offset and, once the last
+    byte has arrived, the path the finished file was moved to.
+
+    Bytes are written as they arrive, so whatever was received before a disconnect
+    is kept and the client resumes from there.
+    """
+    if state.upload_id in _active_patches:
+        raise HTTPException(status_code=423, detail="Upload is already being written")
+    _active_patches.add(state.upload_id)
+    try:
+        current = await state.offset()
+        if offset != current:
+            raise HTTPException(status_code=409, detail=f"Upload-Offset is {current}, not {offset}")
+
+        # Network chunks are small; gather them so each off-loop write moves ~1 MB
+        buffer = bytearray()
+        async with aiofiles.open(state.part_path, "ab") as f:
+            try:
+                async for chunk in chunks:
+                    if current + len(buffer) + len(chunk) > state.length:
+                        raise HTTPException(status_code=413, detail="Body exceeds Upload-Length")
+                    buffer += chunk
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        await f.write(bytes(buffer))
+                        current += len(buffer)
+                        buffer.clear()
+            finally:
+                # Keep what did arrive, even when the client went away mid-body
+                if buffer:
+                    await f.write(bytes(buffer))
+                    current += len(buffer)
+        if current == state.length:
+            return current, await finish_upload(state)
+        return current, None
+    finally:
+        _active_patches.discard(state.upload_id)
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def finish_upload(state: UploadState) -> str:
+    """Verify the checksum (if one was declared) and move the file into UPLOAD_DIR."""
+    if state.sha256:
+        actual = await asyncio.to_thread(_sha256_file, state.part_path)
+        if actual != state.sha256.lower():
+            await state.remove()
+            raise HTTPException(status_code=CHECKSUM_MISMATCH, detail="Checksum mismatch; upload discarded")
+
+    await aiofiles.os.makedirs(UPLOAD_DIR, exist_ok=True)
+    final_path = os.path.join(UPLOAD_DIR, state.filename)
+    # Atomic: readers see the old file or the complete new one, never a partial
+    await aiofiles.os.replace(state.part_path, final_path)
+    await state.remove()
+    return final_path
+
+
+async def save_stream(filename: str, chunks: AsyncIterator[bytes]) -> str:
+    # Stream into a temp file beside the target, then rename, so a failed upload
+    # never replaces an existing file with a truncated one
+    await aiofiles.os.makedirs(UPLOAD_DIR, exist_ok=True)
+    final_path = os.path.join(UPLOAD_DIR, safe_filename(filename))
+    tmp_path = os.path.join(UPLOAD_DIR, f".{secrets.token_hex(8)}.tmp")
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+        await aiofiles.os.replace(tmp_path, final_path)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return final_path
+
+
+def expire_partials(max_age_seconds: float) -> int:
+    # Remove uploads whose sidecar or data has not been touched within max_age_seconds
+    if not os.path.isdir(PARTIAL_UPLOAD_DIR):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    last_touched: Dict[str, float] = {}
+    for entry in os.scandir(PARTIAL_UPLOAD_DIR):
+        upload_id = entry.name.split(".", 1)[0]
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        last_touched[upload_id] = max(last_touched.get(upload_id, 0), mtime)
+
+    removed = 0
+    for upload_id, mtime in last_touched.items():
+        if mtime >= cutoff or upload_id in _active_patches:
+            continue
+        for suffix in (".part", ".json", ".json.tmp"):
+            try:
+                os.remove(os.path.join(PARTIAL_UPLOAD_DIR, upload_id + suffix))
+            except FileNotFoundError:
+                pass
+        removed += 1
+    return removed
+
+
+async def run_janitor():
+    # Background loop started from the app lifespan
+    while True:
+        try:
+            removed = await asyncio.to_thread(expire_partials, UPLOAD_EXPIRE_HOURS * 3600)
+            if removed:
+                print(f"🧹 Removed {removed} stale partial upload(s)")
+        except Exception as e:
+            print(f"Upload janitor failed: {e}")
+        await asyncio.sleep(UPLOAD_JANITOR_INTERVAL)
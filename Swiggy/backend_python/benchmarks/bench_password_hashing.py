@@ -0,0 +1,87 @@
+"""Event-loop lag while many logins verify passwords concurrently.
+
+Compares calling passlib directly inside the coroutine (the old behaviour)
+with the bounded ``password_hasher`` pool. A ticker coroutine sleeps for a
+fixed interval and records how late it wakes up; that delay is what every
+other request on the worker would see.
+
+    python benchmarks/bench_password_hashing.py --logins 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi_common.password_hasher import PasswordHasher  # noqa: E402
+from utils.password_hasher import password_hasher  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(login, logins: int, tick: float) -> dict:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append((time.perf_counter() - started - tick) * 1000)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await ticker_task
+    return {
+        "logins": logins,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+        "loop_lag_ms": {
+            "p50": round(statistics.median(lags), 2) if lags else 0.0,
+            "p99": round(percentile(lags, 99), 2),
+            "max": round(max(lags), 2) if lags else 0.0,
+        },
+    }
+
+
+async def main(logins: int, tick: float):
+    hasher: PasswordHasher = password_hasher
+    hashed = hasher.context.hash("correct horse battery staple")
+
+    async def inline_login():
+        hasher.context.verify("correct horse battery staple", hashed)
+
+    async def pooled_login():
+        await hasher.verify("correct horse battery staple", hashed)
+
+    results = {
+        "inline": await measure(inline_login, logins, tick),
+        "pooled": await measure(pooled_login, logins, tick),
+        "pool": hasher.stats(),
+    }
+    hasher.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50, help="concurrent password verifications")
+    parser.add_argument("--tick", type=float, default=0.005, help="ticker interval in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.tick))
@@ -0,0 +1,78 @@
+"""Cost of turning an admin order list into response bytes.
+
+Compares what FastAPI does for a returned ``to_dict()`` (jsonable_encoder
+followed by JSONResponse) with ``ApiResponse.to_response()``, which encodes
+the envelope directly.
+
+    python benchmarks/bench_serialization.py --orders 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from models.order_model import order_helper  # noqa: E402
+from utils.api_response import ApiResponse  # noqa: E402
+
+
+def make_orders(count: int) -> list:
+    now = datetime.now()
+    address = {"firstName": "A", "lastName": "B", "email": "a@b.c", "street": "1 Main St", "city": "Pune",
+               "state": "MH", "zipcode": "411001", "country": "IN", "phone": "0000000000"}
+    return [order_helper({
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "items": [{"name": f"Food {j}", "price": 9.5 + j, "quantity": 1 + j % 3} for j in range(3)],
+        "amount": 42.5,
+        "address": address,
+        "status": "Food Processing",
+        "date": now - timedelta(minutes=i),
+        "payment": i % 2 == 0,
+    }) for i in range(count)]
+
+
+def default_path(orders):
+    return JSONResponse(jsonable_encoder(ApiResponse(200, orders, "All orders fetched successfully").to_dict())).body
+
+
+def fast_path(orders):
+    return ApiResponse(200, orders, "All orders fetched successfully").to_response().body
+
+
+def time_it(fn, orders, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(orders)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2), "bytes": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    orders = make_orders(args.orders)
+    assert json.loads(default_path(orders)) == json.loads(fast_path(orders))
+    results = {
+        "orders": args.orders,
+        "jsonable_encoder": time_it(default_path, orders, args.repeat),
+        "to_response": time_it(fast_path, orders, args.repeat),
+    }
+    results["speedup"] = round(results["jsonable_encoder"]["median_ms"] / results["to_response"]["median_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
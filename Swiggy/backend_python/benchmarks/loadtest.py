@@ -0,0 +1,279 @@
+"""Reproducible load test for the food-delivery API.
+
+Runs the app in-process (httpx ASGI transport) against either an in-memory
+MongoDB stand-in (mongomock-motor) or a real mongod, seeds users, foods and
+orders, then drives a weighted mix of customer flows at a fixed concurrency
+and prints throughput plus p50/p95/p99 latency per route as JSON.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/loadtest.py --concurrency 50 --duration 30
+    python benchmarks/loadtest.py --backend mongod --mongo-url mongodb://localhost:27017
+
+Save a run with --output and gate later runs on it with --baseline; the
+process exits with status 1 when any route's p95 regresses by more than
+--max-regression. Any route with errors also fails the run: error-path
+latencies are not comparable with successful ones.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Checkout must never reach Stripe from a load test
+os.environ["PAYMENT_PROVIDER"] = "fake"
+os.environ.setdefault("JWT_SECRET", "loadtest-secret")
+# Every simulated client shares one address, which the per-IP limits would throttle
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+import config.database as database  # noqa: E402
+from main import app  # noqa: E402
+from routes.user_routes import create_token  # noqa: E402
+from utils.catalog_cache import food_catalog  # noqa: E402
+from utils.password_hasher import password_hasher  # noqa: E402
+
+CATEGORIES = ["Salad", "Rolls", "Deserts", "Sandwich", "Cake", "Pure Veg", "Pasta", "Noodles"]
+ADDRESS = {
+    "firstName": "Load", "lastName": "Test", "email": "load@test.dev", "street": "1 Bench St",
+    "city": "Pune", "state": "MH", "zipcode": "411001", "country": "IN", "phone": "0000000000",
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, label, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def report(self, elapsed):
+        routes = {}
+        for label in sorted(set(self.latencies) | set(self.errors)):
+            samples = self.latencies[label]
+            routes[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {"seconds": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 1), "routes": routes}
+
+
+async def seed(db, users, foods, orders):
+    # One real bcrypt hash is enough; logins are not part of the mix
+    hashed = await password_hasher.hash("loadtest-password")
+    user_docs = [
+        {"name": f"user{i}", "email": f"user{i}@load.test", "password": hashed,
+         "role": "admin" if i == 0 else "user", "cart_data": {}}
+        for i in range(users)
+    ]
+    result = await db.users.insert_many(user_docs)
+    tokens = [create_token(str(user_id)) for user_id in result.inserted_ids]
+
+    food_docs = [
+        {"name": f"Food {i}", "name_terms": ["food", str(i)], "description": f"Seeded food number {i} " * 5, "price": round(random.uniform(2, 30), 2),
+         "category": CATEGORIES[i % len(CATEGORIES)], "image": f"seed_{i}.png"}
+        for i in range(foods)
+    ]
+    await db.foods.insert_many(food_docs)
+
+    now = datetime.now()
+    order_docs = []
+    for i in range(orders):
+        picked = random.sample(food_docs, k=min(3, len(food_docs)))
+        order_docs.append({
+            "user_id": str(random.choice(result.inserted_ids)),
+            "items": [{"name": f["name"], "price": f["price"], "quantity": 1} for f in picked],
+            "amount": round(sum(f["price"] for f in picked) + 2, 2),
+            "address": ADDRESS,
+            "status": random.choice(["Food Processing", "Out for delivery", "Delivered"]),
+            "date": now - timedelta(minutes=i),
+            "payment": i % 4 != 0,
+        })
+    if order_docs:
+        await db.orders.insert_many(order_docs)
+    await database.create_indexes(db)
+    return tokens
+
+
+async def browse(client, rec, state, rng):
+    response = await rec.call(client, "GET /api/food/list", "GET", "/api/food/list",
+                              headers={"If-None-Match": state.get("etag", "")})
+    if response is not None and response.status_code == 200:
+        state["etag"] = response.headers.get("etag", "")
+        state["foods"] = response.json()["data"]
+    await rec.call(client, "GET /api/food/list?category", "GET", "/api/food/list",
+                   params={"category": rng.choice(CATEGORIES), "limit": 20, "fields": "name,price,image"})
+
+
+async def cart(client, rec, state, rng):
+    headers = {"token": rng.choice(state["tokens"][1:] or state["tokens"])}
+    item_id = rng.choice(state["food_ids"])
+    await rec.call(client, "POST /api/cart/add", "POST", "/api/cart/add", json={"itemId": item_id}, headers=headers)
+    await rec.call(client, "POST /api/cart/remove", "POST", "/api/cart/remove", json={"itemId": item_id}, headers=headers)
+    await rec.call(client, "POST /api/cart/get", "POST", "/api/cart/get", headers=headers)
+
+
+async def order(client, rec, state, rng):
+    headers = {"token": rng.choice(state["tokens"][1:] or state["tokens"])}
+    foods = state.get("foods") or []
+    if not foods:
+        return
+    items = [{**food, "quantity": rng.randint(1, 3)} for food in rng.sample(foods, k=min(2, len(foods)))]
+    body = {"items": items, "amount": round(sum(i["price"] * i["quantity"] for i in items) + 2, 2), "address": ADDRESS}
+    response = await rec.call(client, "POST /api/order/place", "POST", "/api/order/place", json=body, headers=headers)
+    if response is not None and response.status_code < 400:
+        order_id = response.json()["data"]["session_url"].rsplit("orderId=", 1)[-1]
+        await rec.call(client, "POST /api/order/verify", "POST", "/api/order/verify",
+                       json={"orderId": order_id, "success": "true"})
+    await rec.call(client, "POST /api/order/userorders", "POST", "/api/order/userorders", headers=headers)
+
+
+async def admin(client, rec, state, rng):
+    headers = {"token": state["tokens"][0]}
+    await rec.call(client, "GET /api/order/list/stream", "GET", "/api/order/list/stream",
+                   params={"limit": 100}, headers=headers)
+
+
+SCENARIOS = {"browse": browse, "cart": cart, "order": order, "admin": admin}
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}', choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def run(args):
+    if args.backend == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db_name]
+    await client.drop_database(args.db_name)
+    database.client, database.database = client, db
+
+    random.seed(args.seed)
+    tokens = await seed(db, args.users, args.foods, args.orders)
+    food_ids = [str(food["_id"]) async for food in db.foods.find({}, {"_id": 1})]
+    food_catalog.invalidate()
+
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    rec = Recorder()
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(index, http):
+        rng = random.Random(args.seed + index)
+        state = {"tokens": tokens, "food_ids": food_ids}
+        while time.perf_counter() < deadline:
+            await SCENARIOS[rng.choices(names, weights)[0]](http, rec, state, rng)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, http) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    await client.drop_database(args.db_name)
+    password_hasher.shutdown()
+
+    report = rec.report(elapsed)
+    report["config"] = {key: getattr(args, key) for key in ("backend", "concurrency", "duration", "mix", "users", "foods", "orders", "seed")}
+    return report
+
+
+def route_errors(report):
+    return [f"{label}: {route['errors']}/{route['requests']} requests failed"
+            for label, route in report["routes"].items() if route["errors"]]
+
+
+def compare(report, baseline, max_regression):
+    failures = []
+    for label, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(label)
+        if not previous or not previous["p95_ms"] or current["errors"] or previous.get("errors"):
+            # Routes with errors are reported by route_errors; their timings mean nothing here
+            continue
+        change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+        if change > max_regression:
+            failures.append(f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms (+{change:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="food_delivery_loadtest", help="database to seed; dropped before and after")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15, help="seconds to run the mix")
+    parser.add_argument("--mix", default="browse=60,cart=25,order=10,admin=5")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--foods", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="previous JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 increase, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    failed = False
+    errors = route_errors(report)
+    if errors:
+        print("route errors:\n  " + "\n  ".join(errors), file=sys.stderr)
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        if failures:
+            print("p95 regressions:\n  " + "\n  ".join(failures), file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
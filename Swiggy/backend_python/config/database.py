@@ -1,20 +1,246 @@
+import asyncio
 import os
+import threading
+from collections import defaultdict
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import ConfigurationError, OperationFailure
+from pymongo.monitoring import CommandListener, ConnectionPoolListener
 from dotenv import load_dotenv
 
+from fastapi_common.metrics import record_db_call
+from models.food_model import name_terms
+
 load_dotenv()
 
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_RETRIES = int(os.getenv("MONGO_CONNECT_RETRIES", "3"))
+
 client = None
 database = None
+# None until the first transaction attempt tells us whether the deployment supports them
+transactions_supported = None
+
+class PoolStats(ConnectionPoolListener):
+    # pymongo calls these from its own threads
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = defaultdict(int)
+        self.in_use = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self.checkouts = 0
+        self.checkout_failures = 0
+
+    def _address(self, event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            address = self._address(event)
+            self.open.pop(address, None)
+            self.in_use.pop(address, None)
+            self.waiting.pop(address, None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open[self._address(event)] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open[self._address(event)] -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting[self._address(event)] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting[self._address(event)] -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            address = self._address(event)
+            self.waiting[address] -= 1
+            self.in_use[address] += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use[self._address(event)] -= 1
+
+    def snapshot(self, max_pool_size: int) -> dict:
+        with self._lock:
+            servers = {
+                address: {
+                    "open": self.open[address],
+                    "in_use": self.in_use[address],
+                    "waiting": max(0, self.waiting[address]),
+                    "utilization": self.in_use[address] / max_pool_size if max_pool_size else 0.0,
+                }
+                for address in self.open
+            }
+            return {
+                "max_pool_size": max_pool_size,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "servers": servers,
+            }
+
+class CommandMetrics(CommandListener):
+    # Feeds per-command latency and the per-request DB call counters in fastapi_common.metrics
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_db_call(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record_db_call(event.command_name, event.duration_micros / 1e6, outcome="error")
+
+class Database:
+    """Owns the Motor client for the lifetime of the app.
+
+    ``connect()`` fails loudly if the server cannot be reached, opens
+    ``min_pool_size`` connections up front and creates indexes, so the first
+    requests after a deploy do not pay for connection setup.
+    """
+
+    def __init__(self, url=None, max_pool_size=MONGO_MAX_POOL_SIZE, min_pool_size=MONGO_MIN_POOL_SIZE):
+        self.url = url or os.getenv("MONGO_URL")
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min(min_pool_size, max_pool_size)
+        self.pool_stats = PoolStats()
+        self.client = None
+        self.db = None
+
+    async def connect(self, retries: int = MONGO_CONNECT_RETRIES):
+        self.client = AsyncIOMotorClient(
+            self.url,
+            maxPoolSize=self.max_pool_size,
+            minPoolSize=self.min_pool_size,
+            maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[self.pool_stats, CommandMetrics()],
+        )
+        self.db = self.client.get_database()
+
+        for attempt in range(1, retries + 1):
+            try:
+                await self.ping()
+                break
+            except Exception as e:
+                if attempt == retries:
+                    self.client.close()
+                    raise
+                print(f"Database not reachable (attempt {attempt}/{retries}): {e}")
+                await asyncio.sleep(min(2 ** attempt, 10))
+
+        await self.warm_up()
+        await create_indexes(self.db)
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    async def warm_up(self):
+        # Concurrent pings make the driver open min_pool_size sockets now rather than on first use
+        await asyncio.gather(*(self.ping() for _ in range(self.min_pool_size)))
+
+    def stats(self) -> dict:
+        return self.pool_stats.snapshot(self.max_pool_size)
+
+    async def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.db = None
+
+db_component = Database()
 
 async def connect_db():
     global client, database
-    try:
-        client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
-        database = client.get_database()
-        print("DB Connected")
-    except Exception as e:
-        print(f"Database connection error: {e}")
+    await db_component.connect()
+    client = db_component.client
+    database = db_component.db
+    print("DB Connected")
+
+async def close_db():
+    global client, database
+    await db_component.close()
+    client = None
+    database = None
+
+async def create_indexes(db):
+    # create_index is a no-op when an identical index already exists
+    # Backs the category filter + keyset pagination on /api/food/list
+    await db.foods.create_index([("category", ASCENDING), ("_id", ASCENDING)])
+    # Lets remove_food check whether a content-addressed image is still shared
+    await db.foods.create_index("image")
+    # Word-prefix search on /api/food/list?search=
+    await db.foods.create_index("name_terms")
+    await backfill_name_terms(db)
+    # Admin order stream: optional status filter, newest first with (date, _id) keyset
+    await db.orders.create_index([("status", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)])
+    await db.orders.create_index([("date", DESCENDING), ("_id", DESCENDING)])
+    await db.orders.create_index("user_id")
+    # Expiry sweeper: unpaid orders past pending_expires_at (or, for older rows, past their date)
+    await db.orders.create_index([("payment", ASCENDING), ("pending_expires_at", ASCENDING), ("date", ASCENDING)])
+
+async def backfill_name_terms(db):
+    # Foods added before name_terms existed; after the first start this finds nothing
+    updates = [
+        UpdateOne({"_id": food["_id"]}, {"$set": {"name_terms": name_terms(food.get("name", ""))}})
+        async for food in db.foods.find({"name_terms": {"$exists": False}}, {"name": 1})
+    ]
+    if updates:
+        await db.foods.bulk_write(updates, ordered=False)
 
 def get_database():
-    return database
\ No newline at end of file
+    return database
+
+def get_client():
+    return client
+
+async def run_in_transaction(operation):
+    # Runs ``operation(session)`` atomically on replica sets and mongos; standalone
+    # servers have no transactions, so there it runs once with session=None
+    global transactions_supported
+    if client is not None and transactions_supported is not False:
+        try:
+            async with await client.start_session() as session:
+                result = await session.with_transaction(operation)
+            transactions_supported = True
+            return result
+        except (NotImplementedError, ConfigurationError):
+            transactions_supported = False
+        except OperationFailure as e:
+            # IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos"
+            if e.code != 20 or transactions_supported:
+                raise
+            transactions_supported = False
+    return await operation(None)
+
+def get_pool_stats() -> dict:
+    return db_component.stats()
@@ -1,20 +1,49 @@
 from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from config.database import connect_db
+from config.database import connect_db, close_db, get_database, get_pool_stats
 from routes.food_routes import food_router
 from routes.user_routes import user_router
 from routes.cart_routes import cart_router
 from routes.order_routes import order_router
+from routes.image_routes import image_router
+from routes.analytics_routes import analytics_router
+from utils.catalog_cache import food_catalog
+from utils.order_sweeper import order_sweeper
+from utils.password_hasher import password_hasher
+from utils.payments import close_payment_provider
+from utils.images import shutdown_image_workers
+from utils.events import close_broker
+from utils.rate_limit import close_rate_limit_store
+from fastapi_common.metrics import REGISTRY, CONTENT_TYPE_LATEST, MetricsMiddleware
+from middleware.auth import token_cache, role_cache
 
 load_dotenv()
 
-app = FastAPI(title="Food Delivery API", version="1.0.0")
+# Database connection and background workers live as long as the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_db()
+    food_catalog.start_watching(get_database())
+    order_sweeper.start(get_database())
+    try:
+        yield
+    finally:
+        await order_sweeper.stop()
+        await food_catalog.stop_watching()
+        password_hasher.shutdown()
+        await close_payment_provider()
+        shutdown_image_workers()
+        await close_broker()
+        await close_rate_limit_store()
+        await close_db()
+
+app = FastAPI(title="Food Delivery API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -25,25 +54,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static files
-os.makedirs("uploads", exist_ok=True)
-app.mount("/images", StaticFiles(directory="uploads"), name="images")
+# Request metrics, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
 
-# Database connection
-@app.on_event("startup")
-async def startup_event():
-    await connect_db()
+REGISTRY.gauge_callback("mongo_pool_connections_in_use", "Checked-out MongoDB connections",
+                        lambda: {(address,): server["in_use"] for address, server in get_pool_stats()["servers"].items()}, ("server",))
+REGISTRY.gauge_callback("mongo_pool_connections_open", "Open MongoDB connections",
+                        lambda: {(address,): server["open"] for address, server in get_pool_stats()["servers"].items()}, ("server",))
+REGISTRY.gauge_callback("mongo_pool_waiting", "Operations waiting for a MongoDB connection",
+                        lambda: {(address,): server["waiting"] for address, server in get_pool_stats()["servers"].items()}, ("server",))
+REGISTRY.gauge_callback("password_hash_in_flight", "Password hash jobs admitted to the pool", lambda: password_hasher.in_flight)
+REGISTRY.gauge_callback("password_hash_waiting", "Password hash jobs waiting for a slot", lambda: password_hasher.waiting)
+REGISTRY.counter_callback("token_cache_hits_total", "Verified-token cache hits", lambda: token_cache.hits)
+REGISTRY.counter_callback("token_cache_misses_total", "Verified-token cache misses", lambda: token_cache.misses)
+REGISTRY.counter_callback("role_cache_hits_total", "Role cache hits", lambda: role_cache.hits)
+REGISTRY.counter_callback("role_cache_misses_total", "Role cache misses", lambda: role_cache.misses)
+REGISTRY.gauge_callback("food_catalog_version", "Food catalog snapshot version", lambda: food_catalog.version)
+
+# Uploaded images (originals and resized derivatives)
+os.makedirs("uploads", exist_ok=True)
 
 # Routes
 app.include_router(food_router, prefix="/api/food", tags=["food"])
 app.include_router(user_router, prefix="/api/user", tags=["user"])
 app.include_router(cart_router, prefix="/api/cart", tags=["cart"])
 app.include_router(order_router, prefix="/api/order", tags=["order"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(image_router, prefix="/images", tags=["images"])
 
 @app.get("/")
 async def root():
     return {"message": "API Working"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "db_pool": get_pool_stats()}
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 4000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -1,23 +1,75 @@
 from fastapi import HTTPException, Depends, Header
-from jose import JWTError, jwt
+from jose import JWTError
+from bson import ObjectId
+from bson.errors import InvalidId
+from dataclasses import dataclass
 import os
 from typing import Optional
 
+from config.database import get_database
+from fastapi_common.token_cache import TokenCache
+from utils.ttl_cache import TTLCache
+
 SECRET_KEY = os.getenv("JWT_SECRET")
 ALGORITHM = "HS256"
 
+# Verified tokens are kept so repeat calls skip the HMAC check
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# Roles are looked up once per user and kept for a bounded time. Nothing in the app changes
+# a role today; a change made directly in the database (e.g. promoting an admin) is picked
+# up by each worker within ROLE_CACHE_TTL seconds, so lower it if that must be immediate.
+ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "60"))
+ROLE_CACHE_SIZE = int(os.getenv("ROLE_CACHE_SIZE", "10000"))
+role_cache = TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL)
+
+@dataclass(frozen=True)
+class Principal:
+    id: str
+    role: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
 async def get_current_user(token: Optional[str] = Header(None)):
     if not token:
         raise HTTPException(
             status_code=401,
             detail="Not Authorized Login Again"
         )
-    
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.decode(token, SECRET_KEY, [ALGORITHM])
         user_id: str = payload.get("id")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         return user_id
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_user_role(user_id: str) -> Optional[str]:
+    role = role_cache.get(user_id)
+    if role is None:
+        try:
+            user = await get_database().users.find_one({"_id": ObjectId(user_id)}, {"role": 1})
+        except InvalidId:
+            return None
+        if not user:
+            return None
+        role = user.get("role", "user")
+        role_cache.set(user_id, role)
+    return role
+
+async def get_current_principal(user_id: str = Depends(get_current_user)) -> Principal:
+    role = await get_user_role(user_id)
+    if role is None:
+        raise HTTPException(status_code=401, detail="Not Authorized Login Again")
+    return Principal(id=user_id, role=role)
+
+async def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(status_code=403, detail="You are not admin")
+    return principal
@@ -1,3 +1,4 @@
+import re
 from pydantic import BaseModel
 from typing import Optional
 
@@ -11,12 +12,19 @@ class Food(BaseModel):
 class FoodInDB(Food):
     id: Optional[str] = None
 
-def food_helper(food) -> dict:
-    return {
-        "id": str(food["_id"]),
-        "name": food["name"],
-        "description": food["description"],
-        "price": food["price"],
-        "category": food["category"],
-        "image": food["image"]
-    }
\ No newline at end of file
+FOOD_FIELDS = ("name", "description", "price", "category", "image")
+
+def food_helper(food, fields=FOOD_FIELDS) -> dict:
+    data = {"id": str(food["_id"])}
+    for field in fields:
+        data[field] = food[field]
+    return data
+
+def name_terms(name: str) -> list:
+    # Lower-cased words of a food name, stored as "name_terms" so search can use an
+    # anchored prefix match on an index instead of a regex over every name
+    terms = []
+    for term in re.findall(r"\w+", (name or "").lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms
@@ -0,0 +1,152 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from collections import Counter
+from datetime import date
+from typing import Optional
+
+from config.database import get_database
+from middleware.auth import Principal, require_admin
+from utils.api_response import ApiResponse, ApiError
+from utils.sales_rollup import load_rollups, rebuild_rollups
+
+router = APIRouter()
+
+# Every endpoint reads the daily rollups of paid orders, so cost grows with the
+# number of days in the range rather than the number of orders
+
+async def rollups_in_range(date_from: Optional[date], date_to: Optional[date]) -> list:
+    if date_from and date_to and date_from > date_to:
+        raise ApiError(400, "date_from must not be after date_to")
+    return await load_rollups(
+        get_database(),
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None
+    )
+
+def average(total, count) -> float:
+    return round(total / count, 2) if count else 0.0
+
+@router.get("/revenue")
+async def revenue_per_day(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    admin: Principal = Depends(require_admin)
+):
+    try:
+        rollups = await rollups_in_range(date_from, date_to)
+        days = [
+            {
+                "date": rollup["_id"],
+                "orders": rollup.get("orders", 0),
+                "revenue": rollup.get("revenue_cents", 0) / 100,
+                "average_basket": average(rollup.get("revenue_cents", 0) / 100, rollup.get("orders", 0))
+            }
+            for rollup in rollups
+        ]
+        total_cents = sum(rollup.get("revenue_cents", 0) for rollup in rollups)
+        total_orders = sum(rollup.get("orders", 0) for rollup in rollups)
+
+        response = ApiResponse(200, {
+            "days": days,
+            "total_revenue": total_cents / 100,
+            "total_orders": total_orders
+        }, "Revenue fetched successfully")
+        return response.to_dict()
+
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/top-items")
+async def top_items(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    by: str = Query("quantity", pattern="^(quantity|revenue)$"),
+    admin: Principal = Depends(require_admin)
+):
+    try:
+        rollups = await rollups_in_range(date_from, date_to)
+        quantities = Counter()
+        revenue = Counter()
+        names = {}
+        for rollup in rollups:
+            for key, item in (rollup.get("items") or {}).items():
+                quantities[key] += item.get("quantity", 0)
+                revenue[key] += item.get("revenue_cents", 0)
+                names[key] = item.get("name") or names.get(key)
+
+        ranking = quantities if by == "quantity" else revenue
+        items = [
+            {"id": key, "name": names.get(key), "quantity": quantities[key], "revenue": revenue[key] / 100}
+            for key, _ in ranking.most_common(limit)
+        ]
+
+        response = ApiResponse(200, items, "Top items fetched successfully")
+        return response.to_dict()
+
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/status")
+async def orders_per_status(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    admin: Principal = Depends(require_admin)
+):
+    try:
+        rollups = await rollups_in_range(date_from, date_to)
+        statuses = Counter()
+        for rollup in rollups:
+            statuses.update(rollup.get("statuses") or {})
+
+        response = ApiResponse(200, {status: count for status, count in statuses.items() if count}, "Order statuses fetched successfully")
+        return response.to_dict()
+
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/basket")
+async def basket_size(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    admin: Principal = Depends(require_admin)
+):
+    try:
+        rollups = await rollups_in_range(date_from, date_to)
+        orders = sum(rollup.get("orders", 0) for rollup in rollups)
+        revenue = sum(rollup.get("revenue_cents", 0) for rollup in rollups) / 100
+        items_sold = sum(rollup.get("items_sold", 0) for rollup in rollups)
+
+        response = ApiResponse(200, {
+            "orders": orders,
+            "average_amount": average(revenue, orders),
+            "average_items": average(items_sold, orders)
+        }, "Basket size fetched successfully")
+        return response.to_dict()
+
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rebuild")
+async def rebuild(admin: Principal = Depends(require_admin)):
+    # Backfills history and repairs drift. Run it offline (checkout and status updates paused):
+    # rollup increments made while it runs are overwritten. It also scans all paid orders.
+    try:
+        days = await rebuild_rollups(get_database())
+
+        response = ApiResponse(200, {"days": days}, "Analytics rebuilt successfully")
+        return response.to_dict()
+
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+analytics_router = router
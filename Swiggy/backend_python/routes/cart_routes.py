@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from config.database import get_database
 from middleware.auth import get_current_user
@@ -7,6 +8,12 @@ from utils.api_response import ApiResponse, ApiError
 
 router = APIRouter()
 
+def cart_field(item_id) -> str:
+    # Item ids become part of a field path, so reject anything that could escape it
+    if not isinstance(item_id, str) or not item_id or "." in item_id or item_id.startswith("$"):
+        raise ApiError(400, "Invalid item id")
+    return f"cart_data.{item_id}"
+
 @router.post("/add")
 async def add_to_cart(
     cart_data: dict,
@@ -16,22 +23,15 @@ async def add_to_cart(
         db = get_database()
         users_collection = db.users
         
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user:
-            raise ApiError(404, "User not found")
-        
-        cart_data_user = user.get("cart_data", {})
-        item_id = cart_data["itemId"]
+        field = cart_field(cart_data.get("itemId"))
         
-        if item_id not in cart_data_user:
-            cart_data_user[item_id] = 1
-        else:
-            cart_data_user[item_id] += 1
-        
-        await users_collection.update_one(
+        # Atomic increment, so concurrent clicks never overwrite each other
+        result = await users_collection.update_one(
             {"_id": ObjectId(current_user_id)},
-            {"$set": {"cart_data": cart_data_user}}
+            {"$inc": {field: 1}}
         )
+        if result.matched_count == 0:
+            raise ApiError(404, "User not found")
         
         response = ApiResponse(200, None, "Added to Cart")
         return response.to_dict()
@@ -50,24 +50,24 @@ async def remove_from_cart(
         db = get_database()
         users_collection = db.users
         
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user:
-            raise ApiError(404, "User not found")
-        
-        cart_data_user = user.get("cart_data", {})
-        item_id = cart_data["itemId"]
+        field = cart_field(cart_data.get("itemId"))
+        user_id = ObjectId(current_user_id)
         
-        if item_id in cart_data_user:
-            if cart_data_user[item_id] > 1:
-                cart_data_user[item_id] -= 1
-            else:
-                del cart_data_user[item_id]
-        
-        await users_collection.update_one(
-            {"_id": ObjectId(current_user_id)},
-            {"$set": {"cart_data": cart_data_user}}
+        # Decrement in place while more than one is left
+        result = await users_collection.update_one(
+            {"_id": user_id, field: {"$gt": 1}},
+            {"$inc": {field: -1}}
         )
         
+        # Otherwise drop the last one; the guard keeps a concurrent add from being lost
+        if result.matched_count == 0:
+            result = await users_collection.update_one(
+                {"_id": user_id, "$or": [{field: {"$lte": 1}}, {field: {"$exists": False}}]},
+                {"$unset": {field: ""}}
+            )
+            if result.matched_count == 0 and not await users_collection.find_one({"_id": user_id}, {"_id": 1}):
+                raise ApiError(404, "User not found")
+        
         response = ApiResponse(200, None, "Removed from Cart")
         return response.to_dict()
         
@@ -76,13 +76,65 @@ async def remove_from_cart(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/set")
+async def set_cart_quantities(
+    cart_data: dict,
+    current_user_id: str = Depends(get_current_user)
+):
+    try:
+        db = get_database()
+        users_collection = db.users
+        
+        items = cart_data.get("items")
+        if not isinstance(items, dict):
+            raise ApiError(400, "items must be an object of itemId to quantity")
+        
+        quantities = {}
+        for item_id, quantity in items.items():
+            cart_field(item_id)
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+                raise ApiError(400, f"Invalid quantity for {item_id}")
+            quantities[item_id] = quantity
+        
+        # replace=true syncs the whole cart, otherwise only the given items change
+        if cart_data.get("replace"):
+            update = {"$set": {"cart_data": {item_id: quantity for item_id, quantity in quantities.items() if quantity > 0}}}
+        else:
+            update = {}
+            to_set = {cart_field(item_id): quantity for item_id, quantity in quantities.items() if quantity > 0}
+            to_unset = {cart_field(item_id): "" for item_id, quantity in quantities.items() if quantity == 0}
+            if to_set:
+                update["$set"] = to_set
+            if to_unset:
+                update["$unset"] = to_unset
+        
+        if update:
+            user = await users_collection.find_one_and_update(
+                {"_id": ObjectId(current_user_id)},
+                update,
+                projection={"cart_data": 1},
+                return_document=ReturnDocument.AFTER
+            )
+        else:
+            user = await users_collection.find_one({"_id": ObjectId(current_user_id)}, {"cart_data": 1})
+        if not user:
+            raise ApiError(404, "User not found")
+        
+        response = ApiResponse(200, user.get("cart_data", {}), "Cart updated")
+        return response.to_dict()
+        
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/get")
 async def get_cart(current_user_id: str = Depends(get_current_user)):
     try:
         db = get_database()
         users_collection = db.users
         
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(current_user_id)}, {"cart_data": 1})
         if not user:
             raise ApiError(404, "User not found")
         
@@ -1,57 +1,80 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Header, Query, BackgroundTasks
+from fastapi.responses import Response
 from bson import ObjectId
+from bson.errors import InvalidId
 import os
-import aiofiles
-from datetime import datetime
+import re
+from typing import Optional
 
 from config.database import get_database
-from models.food_model import Food, food_helper
+from models.food_model import Food, FOOD_FIELDS, food_helper, name_terms
 from models.user_model import user_helper
-from middleware.auth import get_current_user
+from middleware.auth import Principal, require_admin
 from utils.api_response import ApiResponse, ApiError
+from utils.catalog_cache import food_catalog
+from utils.http_cache import etag_matches
+from utils.storage import stage_upload, publish_upload, discard_upload, delete_unreferenced
+from utils.images import generate_derivatives, delete_derivatives
+from utils.rate_limit import rate_limit
+from utils.single_flight import SingleFlight
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+FOOD_LIST_RATE_LIMIT = os.getenv("FOOD_LIST_RATE_LIMIT", "30/second")
+
+# Identical concurrent page requests (e.g. a burst of cold-start clients) share one query
+food_pages = SingleFlight("food_pages")
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    if not fields:
+        return FOOD_FIELDS
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in requested if f not in FOOD_FIELDS]
+    if unknown:
+        raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
 @router.post("/add")
 async def add_food(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     description: str = Form(...),
     price: float = Form(...),
     category: str = Form(...),
     image: UploadFile = File(...),
-    current_user_id: str = Depends(get_current_user)
+    admin: Principal = Depends(require_admin)
 ):
     try:
         db = get_database()
-        users_collection = db.users
         foods_collection = db.foods
         
-        # Check if user is admin
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user or user.get("role") != "admin":
-            raise ApiError(403, "You are not admin")
-        
-        # Save image
-        timestamp = str(int(datetime.now().timestamp() * 1000))
-        image_filename = f"{timestamp}{image.filename}"
-        
-        os.makedirs("uploads", exist_ok=True)
-        file_path = f"uploads/{image_filename}"
-        
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await image.read()
-            await f.write(content)
+        # Stream the image to disk; it is stored under its content hash
+        image_filename, temp_path = await stage_upload(image)
         
         # Create food item
         food_data = {
             "name": name,
+            "name_terms": name_terms(name),
             "description": description,
             "price": price,
             "category": category,
             "image": image_filename
         }
         
-        await foods_collection.insert_one(food_data)
+        # The reference goes in before the file is placed, so a concurrent remove_food
+        # of the same image either sees it or has its delete undone by publish_upload
+        try:
+            await foods_collection.insert_one(food_data)
+            await publish_upload(temp_path, image_filename)
+        except BaseException:
+            await discard_upload(temp_path)
+            raise
+        food_catalog.invalidate()
+        
+        # Resized copies are rendered after the response is sent
+        background_tasks.add_task(generate_derivatives, image_filename)
         response = ApiResponse(201, None, "Food Added")
         
         return response.to_dict()
@@ -61,48 +84,98 @@ async def add_food(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/list")
-async def list_foods():
+@router.get("/list", dependencies=[Depends(rate_limit("food_list", FOOD_LIST_RATE_LIMIT, by_user=True))])
+async def list_foods(
+    category: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None)
+):
     try:
         db = get_database()
-        foods_collection = db.foods
         
-        foods = []
-        async for food in foods_collection.find():
-            foods.append(food_helper(food))
+        if any(param is not None for param in (category, search, cursor, limit, fields)):
+            return await list_foods_page(db, category, search, cursor, limit, fields)
         
-        response = ApiResponse(200, foods, "All foods fetched successfully")
-        return response.to_dict()
+        # Served from the in-memory catalog, rebuilt only when foods change
+        snapshot = await food_catalog.snapshot(db)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
         
+        if etag_matches(if_none_match, snapshot.etag):
+            return Response(status_code=304, headers=headers)
+        
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+        
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def list_foods_page(db, category, search, cursor, limit, fields):
+    selected_fields = parse_fields(fields)
+    page_size = limit or DEFAULT_PAGE_SIZE
+    page = await food_pages.do(
+        (category, search, cursor, page_size, selected_fields),
+        lambda: fetch_foods_page(db, category, search, cursor, page_size, selected_fields)
+    )
+    response = ApiResponse(200, page, "Foods fetched successfully")
+    return response.to_response()
+
+async def fetch_foods_page(db, category, search, cursor, page_size, selected_fields) -> dict:
+    foods_collection = db.foods
+    
+    query = {}
+    if category:
+        query["category"] = category
+    if search:
+        # Every search word must start one of the name's words. An anchored, case-sensitive
+        # regex on the lower-cased name_terms is an index range scan, so a selective search
+        # reads only its matches (sorted by _id in memory) instead of walking the whole _id index
+        terms = name_terms(search)
+        if not terms:
+            return {"items": [], "next_cursor": None}
+        query["$and"] = [{"name_terms": {"$regex": "^" + re.escape(term)}} for term in terms]
+    if cursor:
+        try:
+            query["_id"] = {"$gt": ObjectId(cursor)}
+        except (InvalidId, TypeError):
+            raise ApiError(400, "Invalid cursor")
+    
+    # Keyset pagination on _id; fetch one extra document to know if there is a next page
+    projection = {field: 1 for field in selected_fields}
+    foods = []
+    async for food in foods_collection.find(query, projection).sort("_id", 1).limit(page_size + 1):
+        foods.append(food_helper(food, selected_fields))
+    
+    next_cursor = None
+    if len(foods) > page_size:
+        foods = foods[:page_size]
+        next_cursor = foods[-1]["id"]
+    
+    return {"items": foods, "next_cursor": next_cursor}
+
 @router.post("/remove")
 async def remove_food(
     food_data: dict,
-    current_user_id: str = Depends(get_current_user)
+    admin: Principal = Depends(require_admin)
 ):
     try:
         db = get_database()
-        users_collection = db.users
         foods_collection = db.foods
         
-        # Check if user is admin
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user or user.get("role") != "admin":
-            raise ApiError(403, "You are not admin")
-        
         # Find and delete food
-        food = await foods_collection.find_one({"_id": ObjectId(food_data["id"])})
+        food = await foods_collection.find_one_and_delete({"_id": ObjectId(food_data["id"])}, projection={"image": 1})
         if not food:
             raise ApiError(404, "Food not found")
+        food_catalog.invalidate()
         
-        # Remove image file
-        image_path = f"uploads/{food['image']}"
-        if os.path.exists(image_path):
-            os.remove(image_path)
-        
-        await foods_collection.delete_one({"_id": ObjectId(food_data["id"])})
+        # Images are shared by content hash, so only remove the file once nothing uses it
+        async def image_in_use() -> bool:
+            return await foods_collection.count_documents({"image": food["image"]}, limit=1) > 0
+        if await delete_unreferenced(food["image"], image_in_use):
+            await delete_derivatives(food["image"])
         
         response = ApiResponse(200, None, "Food Removed")
         return response.to_dict()
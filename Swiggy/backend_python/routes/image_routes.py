@@ -0,0 +1,133 @@
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.responses import Response, StreamingResponse
+import aiofiles
+import aiofiles.os
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from typing import Optional
+
+from utils.http_cache import etag_matches
+from utils.images import IMAGE_FORMATS, get_derivative, pick_width
+from utils.storage import UPLOAD_DIR
+
+router = APIRouter()
+
+# Stored names never change content (new uploads get new names), so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CONTENT_HASH_NAME = re.compile(r"[0-9a-f]{64}")
+READ_CHUNK_SIZE = 64 * 1024
+
+def parse_range(range_header: Optional[str], size: int):
+    # Returns (start, end) for a single satisfiable range, None to serve the whole file
+    # and raises ValueError for an unsatisfiable one
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    ranges = range_header[len("bytes="):].split(",")
+    if len(ranges) != 1:
+        return None
+    start_text, _, end_text = ranges[0].strip().partition("-")
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+    if start is None:
+        if end is None:
+            return None
+        # Suffix range: the last N bytes
+        if end == 0:
+            raise ValueError("Range not satisfiable")
+        start, end = max(0, size - end), size - 1
+    elif end is None:
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+async def read_file_range(path: str, start: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+async def serve_file(request: Request, path: str, media_type: str, etag: str) -> Response:
+    try:
+        stat = await aiofiles.os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = stat.st_size
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range if byte_range else (0, size - 1)
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if request.method == "HEAD" or length <= 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(read_file_range(path, start, length), status_code=status_code,
+                             headers=headers, media_type=media_type)
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def get_image(
+    request: Request,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = Query(None)
+):
+    if filename.startswith(".") or os.path.basename(filename) != filename:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if format is not None and format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(IMAGE_FORMATS)}")
+
+    original = os.path.join(UPLOAD_DIR, filename)
+    if not await aiofiles.os.path.isfile(original):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Content-addressed names are their own strong validator
+    stem = os.path.splitext(filename)[0]
+    if CONTENT_HASH_NAME.fullmatch(stem):
+        base_tag = stem
+    else:
+        stat = await aiofiles.os.stat(original)
+        base_tag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+    if w is None and format is None:
+        media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return await serve_file(request, original, media_type, f'"{base_tag}"')
+
+    width = pick_width(w or 10 ** 9)
+    fmt = format or "webp"
+    try:
+        path = await get_derivative(filename, width, fmt)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Could not process image: {e}")
+    return await serve_file(request, path, IMAGE_FORMATS[fmt], f'"{base_tag}-{width}-{fmt}"')
+
+image_router = router
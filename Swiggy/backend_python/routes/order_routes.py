@@ -1,19 +1,111 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request
+from fastapi.responses import StreamingResponse
+import asyncio
 from bson import ObjectId
-import stripe
+from bson.errors import InvalidId
 import os
 from datetime import datetime
+from typing import Optional
 
-from config.database import get_database
+from config.database import get_database, run_in_transaction
 from models.order_model import Order, order_helper
-from middleware.auth import get_current_user
-from utils.api_response import ApiResponse, ApiError
+from middleware.auth import get_current_user, Principal, require_admin
+from utils.api_response import ApiResponse, ApiError, dumps
+from utils.payments import get_payment_provider, to_cents
+from utils.events import get_broker, order_channel, publish_event
+from utils.order_sweeper import pending_expiry
+from utils.sales_rollup import record_paid_order, record_status_change
+from utils.catalog_cache import food_catalog
 
 router = APIRouter()
 
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+DEFAULT_STREAM_BATCH_SIZE = int(os.getenv("ORDER_STREAM_BATCH_SIZE", "500"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+DELIVERY_FEE_CENTS = int(os.getenv("DELIVERY_FEE_CENTS", "200"))
+MAX_BULK_ORDERS = int(os.getenv("MAX_BULK_ORDERS", "50"))
+
+def order_item_id(item) -> str:
+    # Clients send either the raw Mongo "_id" or the "id" from food_helper
+    return str(item.get("_id") or item.get("id") or "")
+
+def build_order(user_id: str, order_data: dict, foods: dict) -> dict:
+    # Names and prices come from the catalog; the client only chooses items and quantities
+    if not isinstance(order_data, dict) or "address" not in order_data:
+        raise ApiError(400, "Address is required")
+    
+    items = []
+    subtotal = 0
+    for item in order_data.get("items") or []:
+        food = foods.get(order_item_id(item))
+        if food is None:
+            raise ApiError(400, f"Unknown food item: {item.get('name') or order_item_id(item)}")
+        quantity = item.get("quantity")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise ApiError(400, f"Invalid quantity for {food['name']}")
+        items.append({"id": food["id"], "name": food["name"], "price": food["price"], "quantity": quantity})
+        subtotal += to_cents(food["price"]) * quantity
+    if not items:
+        raise ApiError(400, "Order has no items")
+    
+    # The id is generated here so the checkout session can reference it before the insert
+    placed_at = datetime.now()
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "items": items,
+        "amount": (subtotal + DELIVERY_FEE_CENTS) / 100,
+        "address": order_data["address"],
+        "status": "Food Processing",
+        "date": placed_at,
+        "payment": False,
+        # Unpaid orders are deleted by the sweeper after this
+        "pending_expires_at": pending_expiry(placed_at)
+    }
+
+async def save_orders(db, orders: list, user_id: str):
+    # Insert and cart clear commit together where the deployment supports transactions
+    async def write(session):
+        await db.orders.insert_many(orders, session=session)
+        await db.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"cart_data": {}}},
+            session=session
+        )
+    await run_in_transaction(write)
+
+async def create_checkout(order: dict):
+    order_id = str(order["_id"])
+    line_items = [
+        {
+            "price_data": {
+                "currency": "usd",
+                "product_data": {"name": item["name"]},
+                "unit_amount": to_cents(item["price"])
+            },
+            "quantity": item["quantity"]
+        }
+        for item in order["items"]
+    ]
+    line_items.append({
+        "price_data": {
+            "currency": "usd",
+            "product_data": {"name": "Delivery Charges"},
+            "unit_amount": DELIVERY_FEE_CENTS
+        },
+        "quantity": 1
+    })
+    
+    # Idempotent on the order id, so a retried request reuses the same session
+    return await get_payment_provider().create_checkout_session(
+        order_id=order_id,
+        line_items=line_items,
+        success_url=f"{frontend_url}/verify?success=true&orderId={order_id}",
+        cancel_url=f"{frontend_url}/verify?success=false&orderId={order_id}",
+        expires_at=order["pending_expires_at"]
+    )
+
 @router.post("/place")
 async def place_order(
     order_data: dict,
@@ -21,66 +113,55 @@ async def place_order(
 ):
     try:
         db = get_database()
-        orders_collection = db.orders
-        users_collection = db.users
-        
-        # Create order
-        order = {
-            "user_id": current_user_id,
-            "items": order_data["items"],
-            "amount": order_data["amount"],
-            "address": order_data["address"],
-            "status": "Food Processing",
-            "date": datetime.now(),
-            "payment": False
-        }
         
-        result = await orders_collection.insert_one(order)
-        order_id = str(result.inserted_id)
+        foods = await food_catalog.lookup(db, (order_item_id(item) for item in order_data.get("items") or []))
+        order = build_order(current_user_id, order_data, foods)
+        await save_orders(db, [order], current_user_id)
+        session = await create_checkout(order)
         
-        # Clear cart
-        await users_collection.update_one(
-            {"_id": ObjectId(current_user_id)},
-            {"$set": {"cart_data": {}}}
-        )
+        response = ApiResponse(201, {"session_url": session.url}, "Order placed successfully")
+        return response.to_dict()
         
-        # Create Stripe session
-        line_items = []
-        for item in order_data["items"]:
-            line_items.append({
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {
-                        "name": item["name"]
-                    },
-                    "unit_amount": int(item["price"] * 100)
-                },
-                "quantity": item["quantity"]
-            })
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/place/bulk")
+async def place_orders_bulk(
+    bulk_data: dict,
+    current_user_id: str = Depends(get_current_user)
+):
+    # For kiosks submitting several orders at once: one catalog lookup, one write, concurrent checkouts
+    try:
+        db = get_database()
         
-        # Add delivery charges
-        line_items.append({
-            "price_data": {
-                "currency": "usd",
-                "product_data": {
-                    "name": "Delivery Charges"
-                },
-                "unit_amount": 200
-            },
-            "quantity": 1
-        })
-        
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=line_items,
-            mode="payment",
-            success_url=f"{frontend_url}/verify?success=true&orderId={order_id}",
-            cancel_url=f"{frontend_url}/verify?success=false&orderId={order_id}"
-        )
+        orders_data = bulk_data.get("orders")
+        if not isinstance(orders_data, list) or not orders_data:
+            raise ApiError(400, "orders must be a non-empty list")
+        if len(orders_data) > MAX_BULK_ORDERS:
+            raise ApiError(400, f"At most {MAX_BULK_ORDERS} orders per request")
         
-        response = ApiResponse(201, {"session_url": session.url}, "Order placed successfully")
+        item_ids = [
+            order_item_id(item)
+            for order_data in orders_data if isinstance(order_data, dict)
+            for item in order_data.get("items") or []
+        ]
+        foods = await food_catalog.lookup(db, item_ids)
+        # Every order is validated before anything is written
+        orders = [build_order(current_user_id, order_data, foods) for order_data in orders_data]
+        await save_orders(db, orders, current_user_id)
+        sessions = await asyncio.gather(*(create_checkout(order) for order in orders))
+        
+        placed = [
+            {"orderId": str(order["_id"]), "amount": order["amount"], "session_url": session.url}
+            for order, session in zip(orders, sessions)
+        ]
+        response = ApiResponse(201, placed, "Orders placed successfully")
         return response.to_dict()
         
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,13 +175,29 @@ async def verify_order(verify_data: dict):
         success = verify_data["success"]
         
         if success == "true":
-            await orders_collection.update_one(
+            order = await orders_collection.find_one_and_update(
                 {"_id": ObjectId(order_id)},
-                {"$set": {"payment": True}}
+                {"$set": {"payment": True}, "$unset": {"pending_expires_at": ""}},
+                projection={"user_id": 1, "status": 1, "payment": 1, "amount": 1, "items": 1, "date": 1}
             )
-            response = ApiResponse(200, None, "Paid")
+            # The pre-update document tells a first payment from a repeated verify
+            if order and not order.get("payment") and order.get("date"):
+                await record_paid_order(db, order)
+            if order:
+                await publish_event(order_channel(order["user_id"]), {
+                    "type": "payment", "orderId": order_id, "payment": True, "status": order.get("status")
+                })
+                response = ApiResponse(200, None, "Paid")
+            else:
+                # Already cancelled or expired by the sweeper; there is nothing to mark paid
+                response = ApiResponse(404, None, "Order not found")
         else:
-            await orders_collection.delete_one({"_id": ObjectId(order_id)})
+            # Never delete a paid order: its rollup has been counted and would drift
+            order = await orders_collection.find_one_and_delete(
+                {"_id": ObjectId(order_id), "payment": False}, projection={"user_id": 1}
+            )
+            if order:
+                await publish_event(order_channel(order["user_id"]), {"type": "cancelled", "orderId": order_id})
             response = ApiResponse(400, None, "Not Paid")
         
         return response.to_dict()
@@ -119,29 +216,138 @@ async def user_orders(current_user_id: str = Depends(get_current_user)):
             orders.append(order_helper(order))
         
         response = ApiResponse(200, orders, "User orders fetched successfully")
-        return response.to_dict()
+        return response.to_response()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_message(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+async def order_event_stream(request: Request, user_id: str):
+    async with get_broker().subscribe(order_channel(user_id)) as subscription:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            message = await subscription.get(timeout=EVENT_HEARTBEAT_SECONDS)
+            if message is None:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": heartbeat\n\n"
+            else:
+                yield sse_message(message.get("type", "message"), message)
+
+@router.get("/events")
+async def order_events(
+    request: Request,
+    token: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None, alias="token")
+):
+    # EventSource cannot send custom headers, so the token may also come as ?token=
+    current_user_id = await get_current_user(token or access_token)
+    return StreamingResponse(
+        order_event_stream(request, current_user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/list")
-async def list_orders(current_user_id: str = Depends(get_current_user)):
+async def list_orders(admin: Principal = Depends(require_admin)):
     try:
         db = get_database()
-        users_collection = db.users
         orders_collection = db.orders
         
-        # Check if user is admin
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user or user.get("role") != "admin":
-            raise ApiError(403, "You are not admin")
-        
         orders = []
         async for order in orders_collection.find():
             orders.append(order_helper(order))
         
         response = ApiResponse(200, orders, "All orders fetched successfully")
-        return response.to_dict()
+        return response.to_response()
+        
+    except ApiError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def encode_cursor(order) -> str:
+    return f"{order['date'].isoformat()}|{order['_id']}"
+
+def decode_cursor(cursor: str) -> dict:
+    # Keyset on (date, _id), newest first
+    try:
+        date_text, _, order_id = cursor.partition("|")
+        last_date = datetime.fromisoformat(date_text)
+        last_id = ObjectId(order_id)
+    except (ValueError, InvalidId, TypeError):
+        raise ApiError(400, "Invalid cursor")
+    return {"$or": [
+        {"date": {"$lt": last_date}},
+        {"date": last_date, "_id": {"$lt": last_id}}
+    ]}
+
+async def stream_orders_ndjson(cursor, limit: Optional[int], batch_size: int):
+    # One chunk per Mongo batch keeps memory bounded by batch_size
+    lines = []
+    count = 0
+    last_order = None
+    has_more = False
+    try:
+        async for order in cursor:
+            # The query asks for one extra document to tell whether another page exists
+            if limit is not None and count == limit:
+                has_more = True
+                break
+            lines.append(dumps(order_helper(order)))
+            count += 1
+            last_order = order
+            if len(lines) >= batch_size:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+        
+        # Paged requests end with a cursor line for the next page (null when done)
+        if limit is not None:
+            next_cursor = encode_cursor(last_order) if has_more else None
+            yield dumps({"next_cursor": next_cursor}) + b"\n"
+    finally:
+        # Also on client disconnect or a serialization error, so the server-side cursor is not left open
+        await cursor.close()
+
+@router.get("/list/stream")
+async def stream_orders(
+    status: Optional[str] = Query(None),
+    payment: Optional[bool] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    batch_size: int = Query(DEFAULT_STREAM_BATCH_SIZE, ge=1, le=10000),
+    admin: Principal = Depends(require_admin)
+):
+    try:
+        db = get_database()
+        orders_collection = db.orders
+        
+        query = {}
+        if status is not None:
+            query["status"] = status
+        if payment is not None:
+            query["payment"] = payment
+        if date_from is not None or date_to is not None:
+            query["date"] = {}
+            if date_from is not None:
+                query["date"]["$gte"] = date_from
+            if date_to is not None:
+                query["date"]["$lt"] = date_to
+        if cursor:
+            query = {"$and": [query, decode_cursor(cursor)]}
+        
+        orders_cursor = orders_collection.find(query).sort([("date", -1), ("_id", -1)]).batch_size(batch_size)
+        if limit is not None:
+            orders_cursor = orders_cursor.limit(limit + 1)
+        return StreamingResponse(
+            stream_orders_ndjson(orders_cursor, limit, batch_size),
+            media_type="application/x-ndjson"
+        )
         
     except ApiError as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -151,22 +357,24 @@ async def list_orders(current_user_id: str = Depends(get_current_user)):
 @router.post("/status")
 async def update_status(
     status_data: dict,
-    current_user_id: str = Depends(get_current_user)
+    admin: Principal = Depends(require_admin)
 ):
     try:
         db = get_database()
-        users_collection = db.users
         orders_collection = db.orders
         
-        # Check if user is admin
-        user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
-        if not user or user.get("role") != "admin":
-            raise ApiError(403, "You are not an admin")
-        
-        await orders_collection.update_one(
+        order = await orders_collection.find_one_and_update(
             {"_id": ObjectId(status_data["orderId"])},
-            {"$set": {"status": status_data["status"]}}
+            {"$set": {"status": status_data["status"]}},
+            projection={"user_id": 1, "status": 1, "payment": 1, "date": 1}
         )
+        # Only paid orders are in the sales rollups
+        if order and order.get("payment") and order.get("date"):
+            await record_status_change(db, order, status_data["status"])
+        if order:
+            await publish_event(order_channel(order["user_id"]), {
+                "type": "status", "orderId": status_data["orderId"], "status": status_data["status"]
+            })
         
         response = ApiResponse(200, None, "Status Updated Successfully")
         return response.to_dict()
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, HTTPException, Depends
-from passlib.context import CryptContext
 from jose import jwt
 import os
 from datetime import datetime, timedelta
@@ -8,27 +7,31 @@ import re
 from config.database import get_database
 from models.user_model import User, UserLogin, UserResponse, user_helper
 from utils.api_response import ApiResponse, ApiError
+from utils.password_hasher import password_hasher
+from utils.rate_limit import rate_limit
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 SECRET_KEY = os.getenv("JWT_SECRET")
 SALT_ROUNDS = int(os.getenv("SALT", "10"))
+# Both endpoints run bcrypt, so bursts from one client are capped before they reach the hasher
+LOGIN_RATE_LIMIT = os.getenv("LOGIN_RATE_LIMIT", "10/minute")
+REGISTER_RATE_LIMIT = os.getenv("REGISTER_RATE_LIMIT", "5/minute")
 
 def create_token(user_id: str) -> str:
     return jwt.encode({"id": user_id}, SECRET_KEY, algorithm="HS256")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
 
 def is_valid_email(email: str) -> bool:
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
-@router.post("/register")
+@router.post("/register", dependencies=[Depends(rate_limit("register", REGISTER_RATE_LIMIT))])
 async def register_user(user: User):
     try:
         db = get_database()
@@ -48,7 +51,7 @@ async def register_user(user: User):
             raise ApiError(400, "Please enter strong password")
         
         # Hash password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         
         # Create user
         user_data = {
@@ -68,11 +71,11 @@ async def register_user(user: User):
         return response.to_dict()
         
     except ApiError as e:
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit("login", LOGIN_RATE_LIMIT))])
 async def login_user(user_login: UserLogin):
     try:
         db = get_database()
@@ -84,7 +87,7 @@ async def login_user(user_login: UserLogin):
             raise ApiError(404, "User Doesn't exist")
         
         # Verify password
-        if not verify_password(user_login.password, user["password"]):
+        if not await verify_password(user_login.password, user["password"]):
             raise ApiError(401, "Invalid Credentials")
         
         token = create_token(str(user["_id"]))
@@ -93,7 +96,7 @@ async def login_user(user_login: UserLogin):
         return response.to_dict()
         
     except ApiError as e:
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
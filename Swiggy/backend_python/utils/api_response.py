@@ -1,4 +1,34 @@
 from typing import Any, Optional
+from datetime import date, datetime
+import json
+from bson import ObjectId
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt, json keeps the app working without it
+    orjson = None
+
+def json_default(value: Any):
+    # For json.dumps: the types Mongo documents carry that json cannot encode
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    # Compact UTF-8 JSON; orjson encodes datetimes itself and only calls json_default for ObjectId
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=json_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class ApiJSONResponse(Response):
+    # Returned directly from a handler, so FastAPI skips jsonable_encoder on the payload
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
 
 class ApiResponse:
     def __init__(self, status_code: int, data: Any = None, message: str = "Success"):
@@ -14,8 +44,13 @@ class ApiResponse:
             "data": self.data
         }
 
+    def to_response(self, status_code: int = 200, headers: Optional[dict] = None) -> ApiJSONResponse:
+        # Fast path for large payloads (order and food lists); the envelope is the same as to_dict()
+        return ApiJSONResponse(self.to_dict(), status_code=status_code, headers=headers)
+
 class ApiError(Exception):
-    def __init__(self, status_code: int, message: str = "Something went wrong"):
+    def __init__(self, status_code: int, message: str = "Something went wrong", headers: Optional[dict] = None):
         self.status_code = status_code
         self.message = message
+        self.headers = headers
         super().__init__(self.message)
\ No newline at end of file
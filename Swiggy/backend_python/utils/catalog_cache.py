@@ -0,0 +1,146 @@
+import asyncio
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from models.food_model import food_helper
+from utils.api_response import ApiResponse, dumps
+from utils.http_cache import make_etag
+
+CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "30"))
+# Backoff before reopening a change stream that ended or failed, so it cannot spin the loop
+CATALOG_REWATCH_DELAY = 1.0
+CATALOG_REWATCH_MAX_DELAY = 30.0
+# OperationFailure codes meaning this server cannot run change streams at all:
+# 40573 (not a replica set or sharded cluster), 40324 (no $changeStream stage, pre-3.6)
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    foods: List[dict]
+    body: bytes
+    etag: str
+    by_id: Dict[str, dict]
+
+
+class FoodCatalog:
+    """In-memory, pre-serialized copy of the ``foods`` collection.
+
+    The snapshot is rebuilt lazily on the first read after ``invalidate()``;
+    local writes invalidate it directly and external writes are picked up by
+    ``watch()`` through a change stream, or by polling on standalone servers.
+    """
+
+    def __init__(self, message: str = "All foods fetched successfully"):
+        self.message = message
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def invalidate(self):
+        self._dirty = True
+
+    async def snapshot(self, db) -> CatalogSnapshot:
+        if not self._dirty and self._snapshot is not None:
+            return self._snapshot
+        async with self._lock:
+            # Another request may have rebuilt it while we were waiting
+            if self._dirty or self._snapshot is None:
+                await self._rebuild(db)
+        return self._snapshot
+
+    async def _rebuild(self, db):
+        # Clear the flag first so writes racing with the rebuild mark it dirty again
+        self._dirty = False
+        try:
+            foods = [food_helper(food) async for food in db.foods.find()]
+        except Exception:
+            self._dirty = True
+            raise
+
+        body = dumps(ApiResponse(200, foods, self.message).to_dict())
+        self.version += 1
+        by_id = {food["id"]: food for food in foods}
+        self._snapshot = CatalogSnapshot(self.version, foods, body, make_etag(body), by_id)
+
+    async def lookup(self, db, ids: Iterable[str]) -> Dict[str, dict]:
+        # Served from the snapshot; anything it misses (e.g. a food added since the last
+        # rebuild) is fetched with a single $in query. Unknown ids are left out.
+        snapshot = await self.snapshot(db)
+        found = {}
+        missing = []
+        for food_id in set(ids):
+            food = snapshot.by_id.get(food_id)
+            if food is not None:
+                found[food_id] = food
+            else:
+                try:
+                    missing.append(ObjectId(food_id))
+                except (InvalidId, TypeError):
+                    pass
+        if missing:
+            async for food in db.foods.find({"_id": {"$in": missing}}):
+                food = food_helper(food)
+                found[food["id"]] = food
+        return found
+
+    def start_watching(self, db):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch(db))
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def watch(self, db):
+        delay = CATALOG_REWATCH_DELAY
+        while True:
+            try:
+                async with db.foods.watch() as stream:
+                    delay = CATALOG_REWATCH_DELAY
+                    async for _ in stream:
+                        self.invalidate()
+                # The stream ends after an "invalidate" event (foods dropped or renamed)
+                print("Catalog change stream closed; reopening")
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    # Standalone server: there will never be a change stream, so poll instead
+                    return await self._poll(db)
+                print(f"Catalog change stream error: {e}; retrying in {delay:.0f}s")
+            except PyMongoError as e:
+                # Network errors, primary step-downs and the like pass; keep watching
+                print(f"Catalog change stream error: {e}; retrying in {delay:.0f}s")
+
+            # Changes made while no stream was open would be missed, so rebuild on next read
+            self.invalidate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CATALOG_REWATCH_MAX_DELAY)
+
+    async def _poll(self, db):
+        last_hash = None
+        while True:
+            try:
+                result = await db.command("dbHash", collections=["foods"])
+                current_hash = result["collections"].get("foods")
+                if current_hash != last_hash:
+                    if last_hash is not None:
+                        self.invalidate()
+                    last_hash = current_hash
+            except PyMongoError:
+                # dbHash may be unavailable to this user; refresh periodically instead
+                self.invalidate()
+            await asyncio.sleep(CATALOG_POLL_INTERVAL)
+
+
+food_catalog = FoodCatalog()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+from typing import Dict, Optional, Set
+
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory")
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+# Backoff between attempts to resubscribe after the Redis listener fails
+EVENT_RETRY_MIN_SECONDS = 0.5
+EVENT_RETRY_MAX_SECONDS = 30.0
+
+
+def order_channel(user_id: str) -> str:
+    return f"orders:{user_id}"
+
+
+class Subscription:
+    """Async iterator over the messages published to one channel."""
+
+    def __init__(self, broker: "Broker", channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def deliver(self, message: dict):
+        # A slow consumer loses its oldest events rather than blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        return await self.queue.get()
+
+    async def __aenter__(self):
+        await self.broker._attach(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.broker._detach(self)
+
+
+class Broker:
+    def subscribe(self, channel: str) -> Subscription:
+        return Subscription(self, channel)
+
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    async def _attach(self, subscription: Subscription):
+        raise NotImplementedError
+
+    async def _detach(self, subscription: Subscription):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryBroker(Broker):
+    """Single-process fan-out; also the stand-in used by tests and benchmarks."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    async def publish(self, channel: str, message: dict):
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(message)
+
+    async def _attach(self, subscription: Subscription):
+        self._subscribers.setdefault(subscription.channel, set()).add(subscription)
+
+    async def _detach(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+
+class RedisBroker(InMemoryBroker):
+    """Shares events between uvicorn workers through Redis pub/sub.
+
+    Each worker keeps one pattern subscription and fans messages out to its
+    local subscribers, so the number of Redis connections does not grow with
+    the number of open event streams.
+    """
+
+    def __init__(self, url: str, prefix: str = "events:"):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("EVENT_BROKER=redis requires the 'redis' package")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, message: dict):
+        await self._redis.publish(self.prefix + channel, json.dumps(message))
+
+    async def _attach(self, subscription: Subscription):
+        # _listen retries on its own; this also restarts it if it ever exits
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        await super()._attach(subscription)
+
+    async def _listen(self):
+        delay = EVENT_RETRY_MIN_SECONDS
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                try:
+                    await pubsub.psubscribe(self.prefix + "*")
+                    delay = EVENT_RETRY_MIN_SECONDS
+                    async for item in pubsub.listen():
+                        if item.get("type") != "pmessage":
+                            continue
+                        channel = item["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        await super().publish(channel[len(self.prefix):], json.loads(item["data"]))
+                finally:
+                    await pubsub.close()
+                print("Redis event listener stopped; resubscribing")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Subscribers stay attached; events published while we are away are lost
+                print(f"Redis event listener error: {e}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, EVENT_RETRY_MAX_SECONDS)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._redis.close()
+
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        if EVENT_BROKER == "redis":
+            _broker = RedisBroker(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            _broker = InMemoryBroker()
+    return _broker
+
+
+def set_broker(broker: Broker):
+    global _broker
+    _broker = broker
+
+
+async def close_broker():
+    global _broker
+    if _broker is not None:
+        await _broker.close()
+        _broker = None
+
+
+async def publish_event(channel: str, message: dict):
+    # Notifications are best effort; a broker hiccup must not fail the write that triggered it
+    try:
+        await get_broker().publish(channel, message)
+    except Exception as e:
+        print(f"Event publish error on {channel}: {e}")
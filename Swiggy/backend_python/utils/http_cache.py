@@ -0,0 +1,21 @@
+import hashlib
+from typing import Optional
+
+
+def make_etag(content: bytes) -> str:
+    return '"' + hashlib.sha1(content).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match may carry a list of (possibly weak) validators or "*"
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
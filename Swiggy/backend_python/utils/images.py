@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import aiofiles.os
+
+from utils.storage import UPLOAD_DIR
+
+DERIVED_DIR = os.path.join(UPLOAD_DIR, "derived")
+IMAGE_WIDTHS = tuple(sorted(int(w) for w in os.getenv("IMAGE_WIDTHS", "160,320,640,1280").split(",")))
+IMAGE_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, asyncio.Future] = {}
+
+
+def _render(source: str, dest: str, width: int, fmt: str, quality: int):
+    # Runs in a worker process, so Pillow's CPU time never touches the event loop
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail((width, width * 4))
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        temp = f"{dest}.{os.getpid()}.tmp"
+        image.save(temp, format=fmt.upper(), quality=quality)
+    os.replace(temp, dest)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_image_workers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def pick_width(requested: int) -> int:
+    # Snap to a fixed set of sizes so clients cannot make us render arbitrary variants
+    for width in IMAGE_WIDTHS:
+        if width >= requested:
+            return width
+    return IMAGE_WIDTHS[-1]
+
+
+def derivative_name(filename: str, width: int, fmt: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}-{width}.{fmt}"
+
+
+async def get_derivative(filename: str, width: int, fmt: str) -> str:
+    """Return the path of a resized copy of ``filename``, rendering it on first use."""
+    dest = os.path.join(DERIVED_DIR, derivative_name(filename, width, fmt))
+    if os.path.exists(dest):
+        return dest
+
+    # Concurrent requests for the same variant share one render
+    future = _pending.get(dest)
+    if future is None:
+        os.makedirs(DERIVED_DIR, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        future = asyncio.ensure_future(loop.run_in_executor(
+            _get_executor(), _render, os.path.join(UPLOAD_DIR, filename), dest, width, fmt, IMAGE_QUALITY
+        ))
+        _pending[dest] = future
+        future.add_done_callback(lambda _: _pending.pop(dest, None))
+    await asyncio.shield(future)
+    return dest
+
+
+async def generate_derivatives(filename: str, fmt: str = "webp"):
+    # Pre-render the common sizes right after an upload
+    results = await asyncio.gather(
+        *(get_derivative(filename, width, fmt) for width in IMAGE_WIDTHS),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Image derivative error for {filename}: {result}")
+            break
+
+
+async def delete_derivatives(filename: str):
+    for width in IMAGE_WIDTHS:
+        for fmt in IMAGE_FORMATS:
+            try:
+                await aiofiles.os.remove(os.path.join(DERIVED_DIR, derivative_name(filename, width, fmt)))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from utils.events import order_channel, publish_event
+from fastapi_common.metrics import REGISTRY
+
+# The TTL also becomes the Stripe session's expires_at, which Stripe only accepts between
+# 30 minutes and 24 hours after the session is created. The deadline is counted from
+# placed_at, a moment before that call, so keep a minute of margin at the low end.
+PENDING_ORDER_TTL_MINUTES = min(1440, max(31, int(os.getenv("PENDING_ORDER_TTL_MINUTES", "60"))))
+# Nothing but the /verify redirect marks an order paid, so an order is only removed this long
+# after its session expired: a customer who paid in the last seconds still gets verified
+ORDER_SWEEP_GRACE_MINUTES = max(0, int(os.getenv("ORDER_SWEEP_GRACE_MINUTES", "10")))
+ORDER_SWEEP_INTERVAL = float(os.getenv("ORDER_SWEEP_INTERVAL", "60"))
+ORDER_SWEEP_BATCH_SIZE = int(os.getenv("ORDER_SWEEP_BATCH_SIZE", "500"))
+ORDER_SWEEP_MAX_PER_SECOND = float(os.getenv("ORDER_SWEEP_MAX_PER_SECOND", "2000"))
+
+ORDERS_EXPIRED = REGISTRY.counter("orders_expired_total", "Unpaid orders deleted by the expiry sweeper")
+ORDER_SWEEPS = REGISTRY.counter("order_sweeps_total", "Expiry sweeper runs", ("outcome",))
+ORDER_SWEEP_DURATION = REGISTRY.histogram("order_sweep_duration_seconds", "Expiry sweeper run time")
+
+
+def pending_expiry(placed_at: datetime) -> datetime:
+    return placed_at + timedelta(minutes=PENDING_ORDER_TTL_MINUTES)
+
+
+def expired_query(now: datetime) -> dict:
+    # Orders placed before pending_expires_at existed are judged by their age
+    cutoff = now - timedelta(minutes=ORDER_SWEEP_GRACE_MINUTES)
+    return {
+        "payment": False,
+        "$or": [
+            {"pending_expires_at": {"$lte": cutoff}},
+            {"pending_expires_at": {"$exists": False}, "date": {"$lte": cutoff - timedelta(minutes=PENDING_ORDER_TTL_MINUTES)}},
+        ],
+    }
+
+
+class OrderSweeper:
+    """Deletes abandoned checkouts: unpaid orders whose ``pending_expires_at`` passed more
+    than ``ORDER_SWEEP_GRACE_MINUTES`` ago.
+
+    Works in batches of ``batch_size`` and sleeps between batches so that a
+    large backlog is drained at no more than ``max_per_second`` deletes.
+    """
+
+    def __init__(self, interval: float = ORDER_SWEEP_INTERVAL, batch_size: int = ORDER_SWEEP_BATCH_SIZE,
+                 max_per_second: float = ORDER_SWEEP_MAX_PER_SECOND):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_per_second = max_per_second
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep_once(self, db) -> int:
+        started = time.perf_counter()
+        now = datetime.now()
+        query = expired_query(now)
+        removed = 0
+        try:
+            while True:
+                batch_started = time.monotonic()
+                batch = await db.orders.find(query, {"_id": 1, "user_id": 1}).limit(self.batch_size).to_list(self.batch_size)
+                if not batch:
+                    break
+                ids = [order["_id"] for order in batch]
+                # Re-checking payment in the delete keeps a just-paid order from being removed
+                result = await db.orders.delete_many({"_id": {"$in": ids}, "payment": False})
+                removed += result.deleted_count
+                ORDERS_EXPIRED.inc(result.deleted_count)
+                if result.deleted_count:
+                    # Only orders that are really gone get an "expired" event; one paid between
+                    # the find and the delete is still there
+                    kept = set()
+                    if result.deleted_count < len(ids):
+                        kept = {order["_id"] async for order in db.orders.find({"_id": {"$in": ids}}, {"_id": 1})}
+                    for order in batch:
+                        if order["_id"] not in kept:
+                            await publish_event(order_channel(order["user_id"]), {"type": "expired", "orderId": str(order["_id"])})
+                if len(batch) < self.batch_size:
+                    break
+                if self.max_per_second > 0:
+                    pause = len(batch) / self.max_per_second - (time.monotonic() - batch_started)
+                    if pause > 0:
+                        await asyncio.sleep(pause)
+        except Exception:
+            ORDER_SWEEPS.inc(outcome="error")
+            raise
+        finally:
+            ORDER_SWEEP_DURATION.observe(time.perf_counter() - started)
+        ORDER_SWEEPS.inc(outcome="ok")
+        return removed
+
+    async def run(self, db):
+        while True:
+            try:
+                removed = await self.sweep_once(db)
+                if removed:
+                    print(f"Expired {removed} unpaid orders")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Order sweep error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, db):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+order_sweeper = OrderSweeper()
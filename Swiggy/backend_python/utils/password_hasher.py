@@ -0,0 +1,12 @@
+from passlib.context import CryptContext
+
+from fastapi_common.password_hasher import PasswordHasher
+from utils.api_response import ApiError
+
+
+def busy_error() -> ApiError:
+    # Raised inside the routes' try blocks, so it has to be an ApiError to keep its 503
+    return ApiError(503, "Server busy, please try again", headers={"Retry-After": "1"})
+
+
+password_hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], deprecated="auto"), busy_error=busy_error)
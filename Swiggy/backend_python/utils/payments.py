@@ -0,0 +1,153 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from utils.api_response import ApiError
+
+PAYMENT_PROVIDER = os.getenv("PAYMENT_PROVIDER", "stripe")
+PAYMENT_TIMEOUT = float(os.getenv("PAYMENT_TIMEOUT", "10"))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv("PAYMENT_MAX_CONNECTIONS", "20"))
+FAKE_PAYMENT_LATENCY = float(os.getenv("FAKE_PAYMENT_LATENCY", "0"))
+
+
+class CheckoutSession(NamedTuple):
+    id: str
+    url: str
+
+
+class PaymentError(ApiError):
+    def __init__(self, message: str = "Payment provider error"):
+        super().__init__(502, message)
+
+
+class PaymentProvider:
+    async def create_checkout_session(
+        self,
+        order_id: str,
+        line_items: List[dict],
+        success_url: str,
+        cancel_url: str,
+        expires_at: Optional[datetime] = None,
+    ) -> CheckoutSession:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+def to_cents(amount) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+def idempotency_key(order_id: str) -> str:
+    # Retries for the same order must never open a second checkout session
+    return f"checkout-{order_id}"
+
+
+def form_encode(value, prefix: str = "") -> List[tuple]:
+    # Stripe expects nested objects as line_items[0][price_data][currency]=usd
+    if isinstance(value, dict):
+        pairs = []
+        for key, item in value.items():
+            pairs.extend(form_encode(item, f"{prefix}[{key}]" if prefix else key))
+        return pairs
+    if isinstance(value, (list, tuple)):
+        pairs = []
+        for index, item in enumerate(value):
+            pairs.extend(form_encode(item, f"{prefix}[{index}]"))
+        return pairs
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    return [(prefix, str(value))]
+
+
+class StripePaymentProvider(PaymentProvider):
+    def __init__(self, api_key: Optional[str], timeout: float = PAYMENT_TIMEOUT,
+                 max_connections: int = PAYMENT_MAX_CONNECTIONS):
+        self._client = httpx.AsyncClient(
+            base_url="https://api.stripe.com/v1",
+            auth=(api_key or "", ""),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def create_checkout_session(self, order_id, line_items, success_url, cancel_url, expires_at=None):
+        params = {
+            "payment_method_types": ["card"],
+            "line_items": line_items,
+            "mode": "payment",
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "client_reference_id": order_id,
+        }
+        if expires_at is not None:
+            # The session must not outlive the pending order it pays for
+            params["expires_at"] = int(expires_at.timestamp())
+        body = form_encode(params)
+        try:
+            response = await self._client.post(
+                "/checkout/sessions",
+                content=urlencode(body),
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "Idempotency-Key": idempotency_key(order_id),
+                },
+            )
+        except httpx.HTTPError as e:
+            raise PaymentError(f"Payment provider unreachable: {e}")
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code >= 400 or "url" not in data:
+            raise PaymentError(data.get("error", {}).get("message", "Payment provider error"))
+        return CheckoutSession(data["id"], data["url"])
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class FakePaymentProvider(PaymentProvider):
+    """Offline stand-in that sends the customer straight to the success URL."""
+
+    def __init__(self, latency: float = FAKE_PAYMENT_LATENCY):
+        self.latency = latency
+        self.sessions: Dict[str, CheckoutSession] = {}
+
+    async def create_checkout_session(self, order_id, line_items, success_url, cancel_url, expires_at=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        key = idempotency_key(order_id)
+        if key not in self.sessions:
+            self.sessions[key] = CheckoutSession(f"cs_fake_{order_id}", success_url)
+        return self.sessions[key]
+
+
+_provider: Optional[PaymentProvider] = None
+
+
+def get_payment_provider() -> PaymentProvider:
+    global _provider
+    if _provider is None:
+        if PAYMENT_PROVIDER == "fake":
+            _provider = FakePaymentProvider()
+        else:
+            _provider = StripePaymentProvider(os.getenv("STRIPE_SECRET_KEY"))
+    return _provider
+
+
+def set_payment_provider(provider: PaymentProvider):
+    global _provider
+    _provider = provider
+
+
+async def close_payment_provider():
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
@@ -0,0 +1,171 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from middleware.auth import ALGORITHM, SECRET_KEY, token_cache
+from fastapi_common.metrics import REGISTRY
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Only honour X-Forwarded-For behind a proxy that sets it, or clients can pick their own key
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes")
+
+RATE_LIMITED = REGISTRY.counter("rate_limited_total", "Requests rejected by a rate limit", ("limit",))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_rate(text: str) -> Tuple[int, float]:
+    # "10/minute" -> a bucket of 10 tokens refilled at 10 per 60 seconds
+    count, _, period = text.partition("/")
+    if period not in PERIODS:
+        raise ValueError(f"Invalid rate '{text}', expected e.g. 10/minute")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+class RateLimitStore:
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float]:
+        """Takes one token from ``key``'s bucket; returns (allowed, seconds until a token is free)."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process buckets; with several workers each one enforces the limit separately."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def take(self, key, capacity, refill_per_second):
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(capacity), now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        # Least recently seen clients are forgotten first; a forgotten bucket starts full
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / refill_per_second
+
+
+# Refill and take atomically on the Redis server so all workers share one bucket per key
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or capacity
+local at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring((1 - tokens) / rate)}
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key, capacity, refill_per_second):
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[capacity, refill_per_second])
+        return bool(allowed), max(0.0, float(retry_after))
+
+    async def close(self):
+        await self._redis.close()
+
+
+_store: Optional[RateLimitStore] = None
+
+
+def get_rate_limit_store() -> RateLimitStore:
+    global _store
+    if _store is None:
+        if RATE_LIMIT_BACKEND == "redis":
+            _store = RedisRateLimitStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            _store = InMemoryRateLimitStore()
+    return _store
+
+
+def set_rate_limit_store(store: RateLimitStore):
+    global _store
+    _store = store
+
+
+async def close_rate_limit_store():
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def client_key(request: Request) -> str:
+    # Signed-in callers get their own bucket so users behind one NAT do not share a limit
+    token = request.headers.get("token")
+    if token:
+        try:
+            return "user:" + str(token_cache.decode(token, SECRET_KEY, [ALGORITHM])["id"])
+        except Exception:
+            pass
+    return "ip:" + client_ip(request)
+
+
+def rate_limit(name: str, rate: str, by_user: bool = False):
+    """Dependency that answers 429 once a caller exceeds ``rate`` (e.g. "10/minute") on ``name``."""
+    capacity, refill_per_second = parse_rate(rate)
+
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        key = f"{name}:{client_key(request) if by_user else 'ip:' + client_ip(request)}"
+        try:
+            allowed, retry_after = await get_rate_limit_store().take(key, capacity, refill_per_second)
+        except Exception as e:
+            # Fail open: a broken shared store must not take the API down with it
+            print(f"Rate limit store error: {e}")
+            return
+        if not allowed:
+            RATE_LIMITED.inc(limit=name)
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            )
+
+    return dependency
@@ -0,0 +1,149 @@
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ReplaceOne
+
+from utils.payments import to_cents
+
+# One document per day of paid orders, keyed by "YYYY-MM-DD":
+#   {"_id": day, "orders": n, "revenue_cents": n, "items_sold": n,
+#    "items": {item_key: {"name", "quantity", "revenue_cents"}}, "statuses": {status: n}}
+ROLLUP_COLLECTION = "order_stats_daily"
+
+
+def day_key(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def field_key(text) -> str:
+    # Map keys must not contain "." or start with "$"
+    return str(text).replace(".", "_").lstrip("$") or "_"
+
+
+def item_key(item: dict) -> str:
+    # Orders placed before server-side pricing may carry "_id" or only a name
+    return field_key(item.get("id") or item.get("_id") or item.get("name") or "unknown")
+
+
+async def record_paid_order(db, order: dict):
+    """Adds a newly paid order to its day's rollup."""
+    increments = {
+        "orders": 1,
+        "revenue_cents": to_cents(order.get("amount")),
+        f"statuses.{field_key(order.get('status'))}": 1,
+    }
+    names = {}
+    for item in order.get("items") or []:
+        key = item_key(item)
+        quantity = int(item.get("quantity") or 0)
+        increments["items_sold"] = increments.get("items_sold", 0) + quantity
+        increments[f"items.{key}.quantity"] = increments.get(f"items.{key}.quantity", 0) + quantity
+        increments[f"items.{key}.revenue_cents"] = (
+            increments.get(f"items.{key}.revenue_cents", 0) + to_cents(item.get("price")) * quantity
+        )
+        names[f"items.{key}.name"] = item.get("name")
+    update = {"$inc": increments}
+    if names:
+        update["$set"] = names
+    # Best effort like event publishing; rebuild_rollups repairs any drift
+    try:
+        await db[ROLLUP_COLLECTION].update_one({"_id": day_key(order["date"])}, update, upsert=True)
+    except Exception as e:
+        print(f"Sales rollup error: {e}")
+
+
+async def record_status_change(db, order: dict, new_status: str):
+    """Moves a paid order between status counters; ``order`` is the document before the update."""
+    old_key, new_key = field_key(order.get("status")), field_key(new_status)
+    if old_key == new_key:
+        return
+    try:
+        # Only move an order the rollup has counted: an order paid before the rollups existed
+        # has no bucket to leave, and upserting would create a negative counter
+        await db[ROLLUP_COLLECTION].update_one(
+            {"_id": day_key(order["date"]), f"statuses.{old_key}": {"$gt": 0}},
+            {"$inc": {f"statuses.{old_key}": -1, f"statuses.{new_key}": 1}}
+        )
+    except Exception as e:
+        print(f"Sales rollup error: {e}")
+
+
+async def rebuild_rollups(db) -> int:
+    """Recomputes every rollup from ``orders`` with aggregation pipelines.
+
+    Used to backfill history and to repair drift if an incremental update was lost.
+    Returns the number of day documents written.
+
+    Run it offline, while no orders are being paid or moved between statuses:
+    each day is replaced with totals read earlier, so an $inc from
+    record_paid_order/record_status_change that lands in between is lost.
+    """
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+    # Amounts are stored as floats; add 0.5 before truncating to get whole cents
+    amount_cents = {"$toLong": {"$add": [{"$multiply": ["$amount", 100]}, 0.5]}}
+    price_cents = {"$toLong": {"$add": [{"$multiply": ["$items.price", 100]}, 0.5]}}
+    paid = {"$match": {"payment": True, "date": {"$type": "date"}}}
+
+    totals = db.orders.aggregate([
+        paid,
+        {"$group": {
+            "_id": day,
+            "orders": {"$sum": 1},
+            "revenue_cents": {"$sum": amount_cents},
+            "items_sold": {"$sum": {"$sum": "$items.quantity"}},
+        }},
+    ])
+    items = db.orders.aggregate([
+        paid,
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {"day": day, "item": {"$ifNull": ["$items.id", {"$ifNull": ["$items._id", "$items.name"]}]}},
+            "name": {"$first": "$items.name"},
+            "quantity": {"$sum": "$items.quantity"},
+            "revenue_cents": {"$sum": {"$multiply": [price_cents, "$items.quantity"]}},
+        }},
+    ])
+    statuses = db.orders.aggregate([
+        paid,
+        {"$group": {"_id": {"day": day, "status": "$status"}, "count": {"$sum": 1}}},
+    ])
+
+    rollups = {}
+    async for row in totals:
+        rollups[row["_id"]] = {
+            "_id": row["_id"], "orders": row["orders"], "revenue_cents": row["revenue_cents"],
+            "items_sold": row["items_sold"], "items": {}, "statuses": {},
+        }
+    async for row in items:
+        rollup = rollups.get(row["_id"]["day"])
+        if rollup is not None:
+            rollup["items"][field_key(row["_id"]["item"] or "unknown")] = {
+                "name": row["name"], "quantity": row["quantity"], "revenue_cents": row["revenue_cents"],
+            }
+    async for row in statuses:
+        rollup = rollups.get(row["_id"]["day"])
+        if rollup is not None:
+            rollup["statuses"][field_key(row["_id"]["status"])] = row["count"]
+
+    # Each day is swapped in a single write, so readers never see a missing or half-built
+    # day, and a failure part-way leaves the remaining days as they were
+    if rollups:
+        await db[ROLLUP_COLLECTION].bulk_write(
+            [ReplaceOne({"_id": key}, rollup, upsert=True) for key, rollup in rollups.items()],
+            ordered=False
+        )
+    # Then drop days that no longer have any paid orders
+    await db[ROLLUP_COLLECTION].delete_many({"_id": {"$nin": list(rollups)}})
+    return len(rollups)
+
+
+async def load_rollups(db, date_from: Optional[str] = None, date_to: Optional[str] = None) -> list:
+    # Day keys sort lexicographically, so a string range on _id selects the days
+    query = {}
+    if date_from or date_to:
+        query["_id"] = {}
+        if date_from:
+            query["_id"]["$gte"] = date_from
+        if date_to:
+            query["_id"]["$lte"] = date_to
+    return await db[ROLLUP_COLLECTION].find(query).sort("_id", 1).to_list(None)
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from fastapi_common.metrics import REGISTRY
+
+SINGLE_FLIGHT_CALLS = REGISTRY.counter("single_flight_calls_total", "Coalesced calls", ("name", "result"))
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller starts ``fn()``; callers arriving while it runs await the
+    same result instead of repeating the work. Nothing is cached: once the call
+    finishes the next caller starts a fresh one.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            SINGLE_FLIGHT_CALLS.inc(name=self.name, result="leader")
+        else:
+            SINGLE_FLIGHT_CALLS.inc(name=self.name, result="shared")
+        # Shielded so one caller disconnecting does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._calls)
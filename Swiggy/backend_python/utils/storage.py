@@ -0,0 +1,97 @@
+import hashlib
+import os
+import re
+import uuid
+from typing import Awaitable, Callable, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+
+from utils.api_response import ApiError
+
+UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+
+
+def file_extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else ""
+
+
+async def stage_upload(upload: UploadFile, directory: str = UPLOAD_DIR,
+                       max_bytes: int = MAX_IMAGE_BYTES, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, str]:
+    """Stream an upload to a temp file and name it by its SHA-256 digest.
+
+    Returns ``(filename, temp_path)``. Identical content maps to the same name.
+    Record the reference to ``filename`` first, then call ``publish_upload``
+    (or ``discard_upload`` on failure); see ``delete_unreferenced``.
+    """
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ApiError(413, f"File too large (max {max_bytes} bytes)")
+                digest.update(chunk)
+                await f.write(chunk)
+
+        if size == 0:
+            raise ApiError(400, "Empty file")
+
+        return digest.hexdigest() + file_extension(upload.filename), temp_path
+
+    except BaseException:
+        await discard_upload(temp_path)
+        raise
+
+
+async def publish_upload(temp_path: str, filename: str, directory: str = UPLOAD_DIR):
+    # Always replace, even when the file exists: the content is identical, and it puts
+    # back a file that delete_unreferenced is removing at this very moment
+    await aiofiles.os.replace(temp_path, os.path.join(directory, filename))
+
+
+async def discard_upload(temp_path: str):
+    try:
+        await aiofiles.os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def delete_unreferenced(filename: str, is_referenced: Callable[[], Awaitable[bool]],
+                              directory: str = UPLOAD_DIR) -> bool:
+    """Delete a content-addressed file once ``is_referenced()`` says nothing uses it.
+
+    The file is moved aside before a second check and moved back if a writer
+    claimed it in between. Writers record their reference before
+    ``publish_upload``, so either that check sees it or their replace restores
+    the file. Returns True when the file was deleted.
+    """
+    if await is_referenced():
+        return False
+    path = os.path.join(directory, os.path.basename(filename))
+    aside = os.path.join(directory, f".delete-{uuid.uuid4().hex}.part")
+    try:
+        await aiofiles.os.rename(path, aside)
+    except FileNotFoundError:
+        return False
+    try:
+        referenced = await is_referenced()
+    except BaseException:
+        await aiofiles.os.replace(aside, path)
+        raise
+    if referenced:
+        await aiofiles.os.replace(aside, path)
+        return False
+    await aiofiles.os.remove(aside)
+    return True
@@ -0,0 +1,238 @@
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    text = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + text + "}" if text else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list:
+        lines = self._header()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(_Metric):
+    """Gauge read from ``fn`` at scrape time; ``fn`` returns a number or {label tuple: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def render(self) -> list:
+        lines = self._header()
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in values.items():
+            lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}")
+        return lines
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter read from ``fn`` at scrape time, for totals something else already keeps."""
+
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = self._header()
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                pairs = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        # Modules may be imported more than once (e.g. by reloaders); reuse the first instance
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help: str, fn: Callable, labelnames: Tuple[str, ...] = ()) -> CallbackGauge:
+        return self._register(CallbackGauge(name, help, fn, labelnames))
+
+    def counter_callback(self, name: str, help: str, fn: Callable, labelnames: Tuple[str, ...] = ()) -> CallbackCounter:
+        return self._register(CallbackCounter(name, help, fn, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4"
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests served", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served")
+HTTP_RESPONSE_SIZE = REGISTRY.histogram("http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+HTTP_DB_CALLS = REGISTRY.histogram("http_request_db_calls", "Database calls made while serving one request", ("method", "route"), COUNT_BUCKETS)
+HTTP_DB_SECONDS = REGISTRY.histogram("http_request_db_seconds", "Database time spent while serving one request", ("method", "route"))
+DB_CALLS = REGISTRY.counter("db_calls_total", "Database calls", ("operation", "outcome"))
+DB_LATENCY = REGISTRY.histogram("db_call_duration_seconds", "Database call latency", ("operation",))
+
+
+class RequestStats:
+    __slots__ = ("db_calls", "db_seconds")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db_seconds = 0.0
+
+
+# Mutable per-request counters; driver threads see it through the copied context
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def record_db_call(operation: str, seconds: float, outcome: str = "ok"):
+    DB_CALLS.inc(operation=operation, outcome=outcome)
+    DB_LATENCY.observe(seconds, operation=operation)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_calls += 1
+        stats.db_seconds += seconds
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are measured without buffering."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+        size = {"bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                size["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route_label, status=status["code"])
+            HTTP_LATENCY.observe(elapsed, method=method, route=route_label)
+            HTTP_RESPONSE_SIZE.observe(size["bytes"], method=method, route=route_label)
+            HTTP_DB_CALLS.observe(stats.db_calls, method=method, route=route_label)
+            HTTP_DB_SECONDS.observe(stats.db_seconds, method=method, route=route_label)
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from fastapi_common.metrics import REGISTRY
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "5"))
+
+PASSWORD_HASH_SECONDS = REGISTRY.histogram("password_hash_seconds", "Password hash/verify time, queue wait included")
+PASSWORD_HASH_REJECTED = REGISTRY.counter("password_hash_rejected_total", "Password hash jobs rejected with 503 (pool saturated)")
+
+
+def busy_error() -> Exception:
+    return HTTPException(status_code=503, detail="Server busy, please try again", headers={"Retry-After": "1"})
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a small, bounded thread pool.
+
+    bcrypt releases the GIL, so the pool hashes in parallel while the loop
+    keeps serving other requests. At most ``max_workers + max_pending`` calls
+    are admitted; anything beyond that waits up to ``queue_timeout`` seconds
+    and is then rejected with ``busy_error()`` (a 503 with Retry-After by
+    default) instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = HASH_WORKERS,
+                 max_pending: int = HASH_MAX_PENDING, queue_timeout: float = HASH_QUEUE_TIMEOUT,
+                 busy_error: Callable[[], Exception] = busy_error):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.busy_error = busy_error
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise self.busy_error()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            elapsed = time.perf_counter() - started
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            PASSWORD_HASH_SECONDS.observe(elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "waiting": self.waiting,
+            "queued": max(0, self.in_flight - self.max_workers),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
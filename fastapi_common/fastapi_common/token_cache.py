@@ -0,0 +1,69 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+
+
+class TokenCache:
+    """Bounded LRU of verified JWTs mapped to their claims.
+
+    Entries are keyed by a digest of the signing key and the token, so a key
+    rotation simply stops matching old entries. A cached token is never
+    returned past its ``exp`` claim, and tokens without one are re-verified
+    at least every ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str, key: Optional[str]) -> bytes:
+        return hashlib.sha256((key or "").encode() + b"\0" + token.encode()).digest()
+
+    def decode(self, token: str, key: Optional[str], algorithms: List[str]) -> dict:
+        digest = self._digest(token, key)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                claims, expires_at, exp = entry
+                if exp is not None and exp <= now:
+                    del self._entries[digest]
+                    raise ExpiredSignatureError("Signature has expired.")
+                if expires_at > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    # A copy, so a caller that edits its claims cannot change what later requests see
+                    return dict(claims)
+                del self._entries[digest]
+            self.misses += 1
+
+        claims = jwt.decode(token, key, algorithms=algorithms)
+
+        exp = claims.get("exp")
+        expires_at = now + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        with self._lock:
+            self._entries[digest] = (dict(claims), expires_at, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}